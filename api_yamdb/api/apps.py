@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        import api.checks  # noqa: F401
+        import api.db  # noqa: F401
+        import api.signals  # noqa: F401
@@ -0,0 +1,140 @@
+"""
+ASGI-приложение поверх WSGI-обработчика Django 2.2, в котором нет
+собственной поддержки ASGI. Цикл событий принимает соединения и читает
+тела запросов, а сами запросы выполняются в пулах потоков ограниченного
+размера (API_ASGI). GET-запросы к спискам и карточкам произведений,
+отзывам и комментариям идут в отдельный пул чтения, поэтому медленные
+записи не занимают потоки, нужные для чтения. Каждый поток держит своё
+соединение с базой, так что размер пулов ограничивает и число соединений
+"""
+import asyncio
+import io
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def get_environ(scope, body):
+    """WSGI environ для HTTP-запроса ASGI"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # Django ожидает пути в WSGI-кодировке: байты UTF-8 как latin-1
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = environ[name] + separator + value
+        environ[name] = value
+    return environ
+
+
+def call_wsgi(application, scope, body):
+    """Выполняет запрос WSGI-приложением: (статус, заголовки, тело)"""
+    response = {}
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [
+            (name.lower().encode('latin1'), value.encode('latin1'))
+            for name, value in headers
+        ]
+        return chunks.append
+
+    result = application(get_environ(scope, body), start_response)
+    try:
+        chunks.extend(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], b''.join(chunks)
+
+
+class ASGIHandler:
+    """ASGI 3.0: HTTP и lifespan"""
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+        options = settings.API_ASGI
+        self.read_paths = re.compile(options['READ_PATHS'])
+        self.read_pool = ThreadPoolExecutor(options['READ_WORKERS'],
+                                            thread_name_prefix='asgi-read')
+        self.pool = ThreadPoolExecutor(options['WORKERS'],
+                                       thread_name_prefix='asgi')
+
+    def get_pool(self, scope):
+        if (scope['method'] in READ_METHODS
+                and self.read_paths.match(scope['path'])):
+            return self.read_pool
+        return self.pool
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемый тип соединения: '
+                             f'{scope["type"]}')
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_event_loop()
+        status, headers, content = await loop.run_in_executor(
+            self.get_pool(scope), call_wsgi, self.wsgi_application, scope,
+            body
+        )
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def read_body(self, receive):
+        """Тело запроса или None, если клиент отключился"""
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                return b''.join(chunks)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(None, self.shutdown)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def shutdown(self):
+        """Дожидается запросов, которые уже выполняются в пулах"""
+        self.read_pool.shutdown(wait=True)
+        self.pool.shutdown(wait=True)
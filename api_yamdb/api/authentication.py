@@ -0,0 +1,54 @@
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.settings import api_settings
+
+from api import cache, metrics
+
+USER_KEY = 'api:user:{}:{}'
+# Версия всех записей кеша пользователей. Её сдвигает import_csv, который
+# заменяет таблицу пользователей в обход сигналов
+USERS_VERSION = 'users'
+
+
+def get_user_key(user_id):
+    version, = cache.get_versions([USERS_VERSION])
+    return USER_KEY.format(version, user_id)
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """
+    JWT-аутентификация с подсчётом отклонённых токенов. На чтениях
+    пользователь берётся из кеша на API_USER_CACHE['TIMEOUT'] секунд, если
+    кеш общий для воркеров (cache.shared); запись сбрасывается при
+    сохранении или удалении пользователя (api/signals.py). Запросы на
+    изменение проверяют роль и права по пользователю из базы
+    """
+    use_cache = False
+
+    def authenticate(self, request):
+        self.use_cache = cache.shared() and request.method in SAFE_METHODS
+        try:
+            return super().authenticate(request)
+        except AuthenticationFailed as error:
+            codes = error.get_codes()
+            metrics.inc('yamdb_jwt_auth_failures_total',
+                        reason=codes if isinstance(codes, str)
+                        else error.default_code)
+            raise
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not self.use_cache:
+            return super().get_user(validated_token)
+        users = cache.get_cache()
+        key = get_user_key(user_id)
+        user = users.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            users.set(key, user, settings.API_USER_CACHE['TIMEOUT'])
+        elif not user.is_active:
+            raise AuthenticationFailed('User is inactive',
+                                       code='user_inactive')
+        return user
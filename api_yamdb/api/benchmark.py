@@ -0,0 +1,489 @@
+"""
+Нагрузочные замеры эндпоинтов API внутри процесса. Запросы проходят через
+APIClient со всеми middleware, аутентификацией, кешем и сериализацией.
+Для каждого сценария считаются перцентили задержки, количество SQL-запросов
+и пик выделенной памяти на запрос. Результаты сохраняются в JSON как
+базовая линия для сравнения следующих запусков.
+
+run_concurrent сравнивает под одновременной нагрузкой WSGI-обработчик и
+ASGI-приложение api/asgi.py, measure_serializers - стоимость объекта в
+ModelSerializer и в сериализаторах api/read_serializers.py
+"""
+import asyncio
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test.utils import (override_settings, setup_test_environment,
+                               teardown_test_environment)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.asgi import ASGIHandler, call_wsgi
+from api.instrumentation import execute_wrapper, QueryCounter
+from api.read_serializers import (CommentReadSerializer,
+                                  ReviewReadSerializer, TitleReadSerializer)
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleSerializer)
+from reviews.models import (Comment, Genre, OutgoingEmail, Review, Title,
+                            User)
+
+PREFIX = 'bench_'
+# Замер памяти через tracemalloc замедляет запросы, поэтому он идёт
+# отдельным проходом на небольшой выборке
+ALLOCATION_SAMPLES = 20
+CONCURRENT_WARMUP = 20
+COMPARED_METRICS = ('p50', 'p90', 'queries', 'alloc_kib')
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    position = round(percent / 100 * (len(values) - 1))
+    return values[min(len(values) - 1, position)]
+
+
+@contextmanager
+def test_environment():
+    """Почта в памяти и testserver в ALLOWED_HOSTS, как в тестах"""
+    try:
+        setup_test_environment()
+    except RuntimeError:
+        # Окружение уже настроено тестовым раннером
+        yield
+        return
+    try:
+        yield
+    finally:
+        teardown_test_environment()
+
+
+def cleanup():
+    """
+    Удаляет объекты сценариев, в том числе оставшиеся после сбоя, и
+    письма, которые регистрации сценария signup поставили в очередь
+    """
+    Review.objects.filter(author__username__startswith=PREFIX).delete()
+    Title.objects.filter(name__startswith=PREFIX).delete()
+    User.objects.filter(username__startswith=PREFIX).delete()
+    OutgoingEmail.objects.filter(recipients__startswith=PREFIX).delete()
+
+
+class Fixtures:
+    """Объекты, на которых выполняются сценарии; удаляются после замера"""
+
+    def __init__(self):
+        cleanup()
+        self.counter = 0
+        title = Title.objects.order_by('-rating_count', 'id').first()
+        if title is None:
+            raise BenchmarkError('В базе нет произведений')
+        self.title = title
+        self.review = Review.objects.filter(title=title).order_by(
+            '-id'
+        ).first()
+        genre = Genre.objects.filter(titles=title).first()
+        self.genre = genre.slug if genre else ''
+        self.year = title.year
+        self.word = title.name.split()[0]
+        self.admin = User.objects.create(
+            username=f'{PREFIX}admin', email=f'{PREFIX}admin@yamdb.fake',
+            role=User.ADMINISTRATOR,
+        )
+        self.author = User.objects.create(
+            username=f'{PREFIX}author', email=f'{PREFIX}author@yamdb.fake',
+        )
+        self.own_title = Title.objects.create(name=f'{PREFIX}title',
+                                              year=2000)
+        self.own_review = Review.objects.create(
+            title=title, author=self.author, text='Отзыв', score=5
+        )
+        self.code = default_token_generator.make_token(self.author)
+        self.anonymous = APIClient()
+        self.admin_client = self.get_client(self.admin)
+        self.author_client = self.get_client(self.author)
+
+    def get_client(self, user):
+        client = APIClient()
+        token = RefreshToken.for_user(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def next_number(self):
+        self.counter += 1
+        return self.counter
+
+
+class Scenario:
+    """Именованный запрос к API и ожидаемый статус ответа"""
+
+    def __init__(self, name, request, status=200):
+        self.name = name
+        self.request = request
+        self.status = status
+
+    def run(self, fixtures):
+        response = self.request(fixtures)
+        if response.status_code != self.status:
+            raise BenchmarkError(
+                f'{self.name}: статус {response.status_code} вместо '
+                f'{self.status}: {response.content[:200]!r}'
+            )
+        return response
+
+
+def signup(fixtures):
+    name = f'{PREFIX}signup{fixtures.next_number()}'
+    return fixtures.anonymous.post('/api/v1/auth/signup/', data={
+        'username': name, 'email': f'{name}@yamdb.fake',
+    })
+
+
+SCENARIOS = (
+    Scenario('titles-list', lambda fixtures: fixtures.anonymous.get(
+        '/api/v1/titles/'
+    )),
+    Scenario('titles-filter', lambda fixtures: fixtures.anonymous.get(
+        '/api/v1/titles/', {'genre': fixtures.genre, 'year': fixtures.year}
+    )),
+    Scenario('titles-search', lambda fixtures: fixtures.anonymous.get(
+        '/api/v1/titles/', {'search': fixtures.word}
+    )),
+    Scenario('reviews-list', lambda fixtures: fixtures.anonymous.get(
+        f'/api/v1/titles/{fixtures.title.id}/reviews/'
+    )),
+    Scenario('comments-list', lambda fixtures: fixtures.anonymous.get(
+        f'/api/v1/titles/{fixtures.title.id}/reviews/'
+        f'{fixtures.review.id}/comments/'
+    )),
+    Scenario('signup', signup),
+    Scenario('token', lambda fixtures: fixtures.anonymous.post(
+        '/api/v1/auth/token/', data={
+            'username': fixtures.author.username,
+            'confirmation_code': fixtures.code,
+        }
+    )),
+    Scenario('title-patch', lambda fixtures: fixtures.admin_client.patch(
+        f'/api/v1/titles/{fixtures.own_title.id}/',
+        data={'name': f'{PREFIX}title{fixtures.next_number()}'}
+    )),
+    Scenario('review-patch', lambda fixtures: fixtures.author_client.patch(
+        f'/api/v1/titles/{fixtures.title.id}/reviews/'
+        f'{fixtures.own_review.id}/',
+        data={'text': f'Отзыв {fixtures.next_number()}'}
+    )),
+)
+
+
+def get_scenarios(names=None):
+    if not names:
+        return SCENARIOS
+    known = {scenario.name: scenario for scenario in SCENARIOS}
+    unknown = set(names) - set(known)
+    if unknown:
+        raise BenchmarkError(
+            f'Неизвестные сценарии: {", ".join(sorted(unknown))}'
+        )
+    return [known[name] for name in names]
+
+
+def measure(scenario, fixtures, requests, warmup):
+    for _ in range(warmup):
+        scenario.run(fixtures)
+    counter = QueryCounter()
+    timings, queries = [], []
+    with execute_wrapper(counter):
+        for _ in range(requests):
+            before = counter.count
+            start = time.perf_counter()
+            scenario.run(fixtures)
+            timings.append((time.perf_counter() - start) * 1000)
+            queries.append(counter.count - before)
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(min(requests, ALLOCATION_SAMPLES)):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            scenario.run(fixtures)
+            _, peak = tracemalloc.get_traced_memory()
+            allocations.append((peak - current) / 1024)
+    finally:
+        tracemalloc.stop()
+    return {
+        'requests': requests,
+        'mean': statistics.mean(timings),
+        'p50': percentile(timings, 50),
+        'p90': percentile(timings, 90),
+        'p99': percentile(timings, 99),
+        'queries': statistics.mean(queries),
+        'alloc_kib': statistics.median(allocations),
+    }
+
+
+def run(scenarios, requests=200, warmup=20):
+    """Выполняет сценарии и возвращает результаты по именам сценариев"""
+    results = {}
+    # Лимиты частоты превратили бы замер регистрации в замер ответов 429,
+    # поэтому они снимаются, а сама проверка остаётся в замере
+    throttle = dict(settings.API_THROTTLE, RATES={
+        scope: '1000000000/s' for scope in settings.API_THROTTLE['RATES']
+    })
+    with test_environment(), override_settings(API_THROTTLE=throttle):
+        fixtures = Fixtures()
+        try:
+            for scenario in scenarios:
+                results[scenario.name] = measure(scenario, fixtures,
+                                                 requests, warmup)
+        finally:
+            cleanup()
+    return results
+
+
+def get_environment():
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'titles': Title.objects.count(),
+        'reviews': Review.objects.count(),
+    }
+
+
+def save_baseline(path, results):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump({'environment': get_environment(), 'results': results},
+                  file, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Сравнивает результаты с базовой линией. Возвращает строки
+    (сценарий, метрика, было, стало, изменение, регрессия)
+    """
+    rows = []
+    for name, metrics in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous[metric], metrics[metric]
+            if old:
+                change = (new - old) / old
+            else:
+                change = float('inf') if new else 0.0
+            rows.append((name, metric, old, new, change,
+                         new > old and change > tolerance))
+    return rows
+
+
+def get_scope(method, path, headers=()):
+    return {
+        'type': 'http', 'http_version': '1.1', 'method': method,
+        'scheme': 'http', 'path': path, 'root_path': '', 'query_string': b'',
+        'headers': [(b'host', b'testserver'), *headers],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 0),
+    }
+
+
+def get_load(fixtures, requests, write_share):
+    """
+    Запросы для run_concurrent: чтения списков и карточек по кругу и доля
+    write_share правок произведения администратором
+    """
+    title_url = f'/api/v1/titles/{fixtures.title.id}/'
+    reads = [get_scope('GET', path) for path in (
+        '/api/v1/titles/', title_url, f'{title_url}reviews/',
+        f'{title_url}reviews/{fixtures.review.id}/comments/',
+    )]
+    token = RefreshToken.for_user(fixtures.admin).access_token
+    load = []
+    for number in range(requests):
+        if int((number + 1) * write_share) == int(number * write_share):
+            load.append(('read', reads[number % len(reads)], b''))
+            continue
+        body = json.dumps({'name': f'{PREFIX}title{number}'}).encode()
+        load.append(('write', get_scope(
+            'PATCH', f'/api/v1/titles/{fixtures.own_title.id}/', [
+                (b'authorization', f'Bearer {token}'.encode()),
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+            ]
+        ), body))
+    return load
+
+
+def run_wsgi(application, load, concurrency):
+    """Поток на клиента, как у многопоточного WSGI-сервера"""
+    def request(item):
+        kind, scope, body = item
+        start = time.perf_counter()
+        status = call_wsgi(application, scope, body)[0]
+        return kind, status, (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(request, load))
+
+
+async def request_asgi(application, scope, body):
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    return sent[0]['status']
+
+
+def run_asgi(application, load, concurrency):
+    """concurrency клиентов-корутин в одном цикле событий"""
+    items = iter(load)
+    results = []
+
+    async def client():
+        for kind, scope, body in items:
+            start = time.perf_counter()
+            status = await request_asgi(application, scope, body)
+            results.append((kind, status,
+                            (time.perf_counter() - start) * 1000))
+
+    async def clients():
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(clients())
+    finally:
+        loop.close()
+    return results
+
+
+def measure_concurrent(mode, wsgi, load, concurrency):
+    start = time.perf_counter()
+    if mode == 'wsgi':
+        results = run_wsgi(wsgi, load, concurrency)
+    else:
+        application = ASGIHandler(wsgi)
+        try:
+            results = run_asgi(application, load, concurrency)
+        finally:
+            application.shutdown()
+    elapsed = time.perf_counter() - start
+    failed = sorted({status for _, status, _ in results if status != 200})
+    if failed:
+        raise BenchmarkError(f'{mode}: статусы ответов {failed}')
+    reads = [timing for kind, _, timing in results if kind == 'read']
+    writes = [timing for kind, _, timing in results if kind == 'write']
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        'rps': len(results) / elapsed,
+        'read_p50': percentile(reads, 50),
+        'read_p99': percentile(reads, 99),
+        'write_p99': percentile(writes, 99) if writes else None,
+    }
+
+
+def run_concurrent(levels, requests=400, write_share=0.1):
+    """
+    Замеряет WSGI и ASGI под нагрузкой из concurrency одновременных
+    клиентов для каждого уровня levels
+    """
+    rows = []
+    with test_environment():
+        fixtures = Fixtures()
+        try:
+            load = get_load(fixtures, requests, write_share)
+            wsgi = WSGIHandler()
+            for _, scope, body in load[:CONCURRENT_WARMUP]:
+                call_wsgi(wsgi, scope, body)
+            for concurrency in levels:
+                for mode in ('wsgi', 'asgi'):
+                    rows.append(measure_concurrent(mode, wsgi, load,
+                                                   concurrency))
+        finally:
+            cleanup()
+    return rows
+
+
+# Имя, queryset как во ViewSet, ModelSerializer и сериализатор на values()
+SERIALIZER_CASES = (
+    ('titles', lambda: Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre'), TitleSerializer, TitleReadSerializer),
+    ('reviews', lambda: Review.objects.select_related('author'),
+     ReviewSerializer, ReviewReadSerializer),
+    ('comments', lambda: Comment.objects.select_related('author'),
+     CommentSerializer, CommentReadSerializer),
+)
+
+
+def best_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def measure_serializers(count=500, repeat=5):
+    """
+    Стоимость одного объекта в микросекундах при чтении count объектов
+    вместе с запросами к базе: ModelSerializer и сериализатор на values().
+    Перед замером проверяется, что ответы совпадают
+    """
+    renderer = JSONRenderer()
+    results = {}
+    for name, get_queryset, model_serializer, read_serializer in (
+        SERIALIZER_CASES
+    ):
+        def model():
+            return model_serializer(get_queryset()[:count], many=True).data
+
+        def values():
+            return read_serializer(
+                read_serializer.get_values(get_queryset())[:count],
+                many=True
+            ).data
+
+        expected = model()
+        if not expected:
+            raise BenchmarkError(f'{name}: в базе нет объектов')
+        if renderer.render(values()) != renderer.render(expected):
+            raise BenchmarkError(f'{name}: ответы сериализаторов '
+                                 f'различаются')
+        objects = len(expected)
+        model_us = best_time(model, repeat) / objects * 1e6
+        values_us = best_time(values, repeat) / objects * 1e6
+        results[name] = {
+            'objects': objects,
+            'model_us': model_us,
+            'values_us': values_us,
+            'speedup': model_us / values_us,
+        }
+    return results
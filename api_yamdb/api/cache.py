@@ -0,0 +1,184 @@
+import hashlib
+import random
+import threading
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils.http import quote_etag
+
+from api import metrics
+from reviews.models import CacheVersion
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+
+# Кеши, которые не видны другим процессам
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def enabled():
+    """Кеш ответов включён: API_RESPONSE_CACHE['ALIAS'] не пуст"""
+    return settings.API_RESPONSE_CACHE['ALIAS'] is not None
+
+
+def shared():
+    """
+    Кеш общий для воркеров, и изменение в одном воркере видно остальным.
+    Без общего кеша версии моделей хранятся в базе, а пользователи из
+    токенов и закрепления за основной базой не кешируются
+    """
+    shared = settings.API_RESPONSE_CACHE['SHARED']
+    if shared is None:
+        alias = settings.API_RESPONSE_CACHE['ALIAS'] or DEFAULT_CACHE_ALIAS
+        shared = settings.CACHES[alias]['BACKEND'] not in LOCAL_BACKENDS
+    return shared
+
+
+def get_cache():
+    return caches[settings.API_RESPONSE_CACHE['ALIAS'] or DEFAULT_CACHE_ALIAS]
+
+
+def _initial_version():
+    # Случайное начальное значение, чтобы после вытеснения или сброса
+    # счётчика версия не совпала ни с одной из выданных ранее
+    return random.getrandbits(48)
+
+
+def object_version(model_name, pk):
+    """Имя версии отдельного объекта для get_versions и invalidate"""
+    return f'{model_name}:{pk}'
+
+
+def _versions_in_db():
+    # Версии читаются и пишутся только в основной базе: реплика отстаёт
+    return CacheVersion.objects.using(DEFAULT_DB_ALIAS)
+
+
+def get_versions(model_names):
+    """Возвращает текущие версии моделей, создавая недостающие счётчики"""
+    keys = [VERSION_KEY.format(name) for name in model_names]
+    if not shared():
+        versions = _versions_in_db()
+        found = dict(versions.filter(name__in=keys)
+                     .values_list('name', 'version'))
+        missing = [key for key in keys if key not in found]
+        if missing:
+            versions.bulk_create(
+                [CacheVersion(name=key, version=_initial_version())
+                 for key in missing],
+                ignore_conflicts=True,
+            )
+            found.update(versions.filter(name__in=missing)
+                         .values_list('name', 'version'))
+        return [found[key] for key in keys]
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*model_names):
+    keys = [VERSION_KEY.format(name) for name in model_names]
+    if not shared():
+        # Отсутствующая версия будет создана со случайным значением при
+        # следующем чтении
+        _versions_in_db().filter(name__in=keys).update(
+            version=F('version') + 1
+        )
+        return
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), None)
+
+
+def invalidate(*model_names):
+    """
+    Сдвигает версии моделей после фиксации транзакции, чтобы конкурентный
+    запрос не закешировал данные, которые ещё не записаны
+    """
+    transaction.on_commit(lambda: bump_versions(*model_names))
+
+
+def get_auth_state(request):
+    """Часть ключа кеша, зависящая от роли пользователя"""
+    user = request.user
+    if not user or not user.is_authenticated:
+        return 'anonymous'
+    if user.is_superuser:
+        return 'superuser'
+    return user.role
+
+
+def _digest(*parts):
+    return hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _query_string(request):
+    return urlencode(sorted(request.query_params.lists()), doseq=True)
+
+
+def make_response_key(request, versions):
+    digest = _digest(request.path, _query_string(request),
+                     get_auth_state(request), *versions)
+    return RESPONSE_KEY.format(digest)
+
+
+def make_etag(request, versions):
+    """
+    Сильный ETag представления: путь, параметры запроса, формат ответа и
+    версии моделей. Роль не учитывается, чтобы ETag из GET можно было
+    передать в If-Match при PATCH от имени другого пользователя
+    """
+    digest = _digest(request.path, _query_string(request),
+                     request.accepted_renderer.format, *versions)
+    return quote_etag(digest)
+
+
+def get_response(key):
+    """(данные, прочитаны ли с реплики) или None"""
+    return get_cache().get(key)
+
+
+def set_response(key, data, replica):
+    timeout = settings.API_RESPONSE_CACHE['TIMEOUT']
+    if replica:
+        # Реплика может отставать, а ключ содержит уже новые версии
+        # моделей, поэтому такой ответ кешируется ненадолго
+        timeout = min(timeout, settings.API_REPLICAS['CACHE_TIMEOUT'])
+    get_cache().set(key, (data, replica), timeout)
+
+
+def record(view_name, hit):
+    with _stats_lock:
+        _stats[(view_name, 'hits' if hit else 'misses')] += 1
+    metrics.inc('yamdb_response_cache_total', view=view_name,
+                result='hit' if hit else 'miss')
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кеша текущего процесса по ViewSet"""
+    with _stats_lock:
+        stats = dict(_stats)
+    result = {}
+    for (view_name, kind), value in sorted(stats.items()):
+        result.setdefault(view_name, {'hits': 0, 'misses': 0})[kind] = value
+    for counters in result.values():
+        total = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = counters['hits'] / total if total else None
+    return result
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core import checks
+
+
+@checks.register(checks.Tags.caches)
+def check_response_cache(app_configs, **kwargs):
+    """Кеш ответов должен быть описан в CACHES"""
+    alias = settings.API_RESPONSE_CACHE['ALIAS']
+    if alias is None or alias in settings.CACHES:
+        return []
+    return [checks.Error(
+        f'API_RESPONSE_CACHE: кеш `{alias}` не описан в CACHES',
+        id='api.E001',
+    )]
@@ -1,6 +1,11 @@
-from rest_framework import mixins, viewsets
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import parse_etags
+from rest_framework import mixins, status, viewsets
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 
+from api import cache, routers
+
 
 class CustomUpdateModelMixin(object):
     """
@@ -25,6 +30,210 @@ class CustomUpdateModelMixin(object):
         serializer.save()
 
 
+class ParentObjectMixin(object):
+    """
+    Миксин для вложенных ViewSet (titles/{id}/reviews и т.п.).
+    Родительский объект разрешается по kwargs из URL не более одного раза
+    за запрос и кешируется. На детальных маршрутах родитель проверяется
+    в том же запросе, что и дочерний объект, и берётся из него
+    """
+    parent_model = None
+    # Имя ForeignKey дочерней модели на родителя
+    parent_field = None
+    # Соответствие поле родителя -> kwarg из URL
+    parent_lookups = {}
+
+    def get_parent_lookups(self):
+        return {field: self.kwargs[kwarg]
+                for field, kwarg in self.parent_lookups.items()}
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            self._parent = get_object_or_404(self.parent_model,
+                                             **self.get_parent_lookups())
+        return self._parent
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Условие, чтобы в консоли не отображалась ошибка при генерации
+        # документации yasg
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset.none()
+        if self.action == 'list':
+            # Для пустого списка у существующего родителя нужен 200,
+            # а у несуществующего 404, поэтому родитель проверяется явно
+            return queryset.filter(**{self.parent_field: self.get_parent()})
+        return queryset.select_related(self.parent_field).filter(**{
+            f'{self.parent_field}__{field}': value
+            for field, value in self.get_parent_lookups().items()
+        })
+
+    def get_object(self):
+        obj = super().get_object()
+        self._parent = getattr(obj, self.parent_field)
+        return obj
+
+
+class ReplicaReadMixin(object):
+    """
+    Чтения queryset ViewSet идут на реплику, если ReplicaMiddleware
+    разрешила это для запроса. Пользователь и права к этому моменту уже
+    проверены по основной базе
+    """
+
+    def get_queryset(self):
+        routers.read_from_replica()
+        return super().get_queryset()
+
+
+class VersionedResponseMixin(object):
+    """
+    Условные запросы и кеш ответов на основе версий моделей из
+    version_models, которые сдвигаются при изменении этих моделей.
+    ETag вычисляется без чтения данных: ответ 304 читает только версии,
+    из общего кеша или, без него, одним запросом к базе. При
+    cache_responses и включённом кеше ответов (cache.enabled) данные
+    успешных ответов кешируются. Ответ, прочитанный с реплики, может
+    отставать от версий, поэтому ETag к нему не добавляется: клиент не
+    получит 304 на устаревшие данные
+    """
+    version_models = ()
+    cache_responses = False
+
+    def get_version_models(self):
+        return self.version_models
+
+    def get_etag(self, request):
+        return cache.make_etag(
+            request, cache.get_versions(self.get_version_models())
+        )
+
+    def versioned_response(self, handler, request, *args, **kwargs):
+        versions = cache.get_versions(self.get_version_models())
+        etag = cache.make_etag(request, versions)
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '').strip()
+        # Для * нужно знать, существует ли объект, поэтому ответ строится
+        if (if_none_match and if_none_match != '*'
+                and etag in parse_etags(if_none_match)):
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+        response = None
+        caching = self.cache_responses and cache.enabled()
+        if caching:
+            key = cache.make_response_key(request, versions)
+            cached = cache.get_response(key)
+            cache.record(self.__class__.__name__, cached is not None)
+            if cached is not None:
+                data, replica = cached
+                response = Response(data)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            replica = routers.using_replica()
+            if caching and response.status_code == 200:
+                cache.set_response(key, response.data, replica)
+        if response.status_code != 200:
+            return response
+        headers = {} if replica else {'ETag': etag}
+        if if_none_match == '*':
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+
+class VersionedListMixin(VersionedResponseMixin):
+    """ETag и кеширование ответа list"""
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(super().list, request, *args,
+                                       **kwargs)
+
+
+class VersionedObjectMixin(VersionedResponseMixin):
+    """
+    ETag и кеширование ответа retrieve, проверка If-Match при
+    partial_update для защиты от потерянных обновлений. Версия самой модели
+    в ETag объекта заменяется версией объекта ({модель}:{pk}), поэтому
+    изменение других объектов её не сдвигает. Остальные зависимости
+    объекта перечислены в object_version_models
+    """
+    object_version_models = ()
+
+    def get_version_models(self):
+        if self.action not in ('retrieve', 'partial_update'):
+            return super().get_version_models()
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            # Тот же ключ, что и в сигналах: /titles/05/ - это объект 5
+            lookup = int(lookup)
+        except ValueError:
+            pass
+        model_name = self.queryset.model._meta.model_name
+        return (cache.object_version(model_name, lookup),
+                *self.object_version_models)
+
+    def get_object(self):
+        # partial_update получает объект до проверки If-Match
+        if not hasattr(self, '_object'):
+            self._object = super().get_object()
+        return self._object
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(super().retrieve, request, *args,
+                                       **kwargs)
+
+    def partial_update(self, request, *args, **kwargs):
+        # Сначала 404 и проверка прав, потом If-Match
+        self.get_object()
+        if_match = request.META.get('HTTP_IF_MATCH')
+        if if_match and if_match.strip() != '*':
+            if self.get_etag(request) not in parse_etags(if_match):
+                return Response(
+                    {'detail': 'Объект был изменён, получите его заново.'},
+                    status=status.HTTP_412_PRECONDITION_FAILED
+                )
+        response = super().partial_update(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = self.get_etag(request)
+        return response
+
+
+class ValuesReadMixin(object):
+    """
+    list и retrieve читают строки через values() и строят ответ
+    read_serializer_class (api/read_serializers.py) без полей
+    ModelSerializer. Фильтры, пагинация и права доступа те же: права
+    объекта проверяются по экземпляру модели, который загружается, только
+    если проверка обращается к объекту (например, IsOwner)
+    """
+    read_serializer_class = None
+
+    def get_read_queryset(self):
+        return self.read_serializer_class.get_values(
+            self.filter_queryset(self.get_queryset())
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_read_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.read_serializer_class(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.read_serializer_class(queryset, many=True)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(self.get_read_queryset(), **{
+            self.lookup_field: self.kwargs[lookup_url_kwarg]
+        })
+        self.check_object_permissions(request, SimpleLazyObject(
+            lambda: self.get_queryset().get(pk=row['id'])
+        ))
+        return Response(self.read_serializer_class(row).data)
+
+
 class ListCreateDestroyViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
@@ -0,0 +1,34 @@
+"""
+Настройка соединений с базой. Django держит одно соединение на поток и
+переиспользует его CONN_MAX_AGE секунд, поэтому пул воркера - это его
+потоки. Перед каждым запросом переиспользуемые соединения проверяются
+(pre-ping), чтобы запрос не получил соединение, закрытое сервером базы.
+Новым соединениям с SQLite задаются PRAGMA из SQLITE_PRAGMAS
+"""
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+# Подключается после close_old_connections из django.db, поэтому
+# устаревшие соединения к этому моменту уже закрыты
+@receiver(request_started)
+def check_connections(**kwargs):
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.is_usable():
+            connection.close()
@@ -1,5 +1,6 @@
 from django_filters import rest_framework as filters
 
+from api.search import search_titles
 from reviews.models import Category, Genre, Title
 
 
@@ -11,7 +12,12 @@ class TitleFilter(filters.FilterSet):
                                          to_field_name='slug',
                                          queryset=Category.objects.all())
     name = filters.CharFilter(field_name='name', lookup_expr='icontains')
+    # Полнотекстовый поиск по названию и описанию с ранжированием
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('genre', 'category', 'name', 'year')
+        fields = ('genre', 'category', 'name', 'year', 'search')
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
@@ -0,0 +1,216 @@
+"""
+Инструментирование запросов к API: время ответа, количество и время
+SQL-запросов, время сериализации и размер ответа по каждому view и
+действию. Замеряется случайная выборка запросов (API_INSTRUMENTATION
+['SAMPLE_RATE']), результаты копятся в гистограммах текущего процесса и
+отдаются в заголовке Server-Timing администраторам (и всем при DEBUG)
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Верхние границы корзин гистограмм: миллисекунды для времени,
+# штуки для запросов и килобайты для размера ответа
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000,
+           float('inf'))
+METRICS = ('total', 'db', 'serializer', 'queries', 'size_kib')
+
+_current = ContextVar('instrumentation', default=None)
+
+
+class RequestMetrics:
+    """Замеры одного запроса"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+
+class Histogram:
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent):
+        """Верхняя граница корзины, в которую попадает перцентиль"""
+        rank = percent / 100 * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+            'buckets': dict(zip(map(str, BUCKETS), self.counts)),
+        }
+
+
+class HistogramStore:
+    """Гистограммы метрик по view текущего процесса"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view_name, values):
+        with self.lock:
+            histograms = self.views.setdefault(
+                view_name, {metric: Histogram() for metric in METRICS}
+            )
+            for metric, value in values.items():
+                histograms[metric].add(value)
+
+    def dump(self):
+        with self.lock:
+            return {
+                view_name: {metric: histogram.as_dict()
+                            for metric, histogram in histograms.items()}
+                for view_name, histograms in sorted(self.views.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+
+store = HistogramStore()
+
+
+class QueryCounter:
+    """Обёртка execute, считающая SQL-запросы"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def execute_wrapper(wrapper):
+    """Подключает обёртку execute ко всем соединениям с базами"""
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(wrapper))
+        yield
+
+
+def get_view_action(request):
+    """Класс view и действие DRF, например ('TitleViewSet', 'list')"""
+    match = getattr(request, 'resolver_match', None)
+    view_class = getattr(match and match.func, 'cls', None)
+    if view_class is None:
+        return None
+    method = request.method.lower()
+    actions = getattr(match.func, 'actions', None) or {}
+    return view_class.__name__, actions.get(method, method)
+
+
+def get_view_name(request):
+    view_action = get_view_action(request)
+    return view_action and '.'.join(view_action)
+
+
+def format_server_timing(total, metrics, size):
+    return (f'total;dur={total:.2f}, '
+            f'db;dur={metrics.db * 1000:.2f};desc="{metrics.queries} '
+            f'queries", serializer;dur={metrics.serializer * 1000:.2f}, '
+            f'size;desc="{size} bytes"')
+
+
+def show_server_timing(request):
+    """Замеры видят те же, кому доступен /api/v1/instrumentation/"""
+    if settings.DEBUG:
+        return True
+    # DRF записывает пользователя из JWT и в исходный HttpRequest
+    user = getattr(request, 'user', None)
+    return bool(user and user.is_authenticated and (
+        user.is_staff or user.is_superuser or user.is_admin
+    ))
+
+
+class InstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.API_INSTRUMENTATION['SAMPLE_RATE']
+        if rate <= 0 or random.random() >= rate:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = (time.perf_counter() - start) * 1000
+        view_name = get_view_name(request)
+        if view_name is None:
+            return response
+        size = 0 if response.streaming else len(response.content)
+        if show_server_timing(request):
+            response['Server-Timing'] = format_server_timing(
+                total, metrics, size
+            )
+        store.record(view_name, {
+            'total': total,
+            'db': metrics.db * 1000,
+            'serializer': metrics.serializer * 1000,
+            'queries': metrics.queries,
+            'size_kib': size / 1024,
+        })
+        return response
+
+
+class TimedSerializerMixin:
+    """Учитывает время to_representation во времени сериализации запроса"""
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        # Вложенные сериализаторы входят во время внешнего
+        if metrics is None or metrics.serializer_depth:
+            return super().to_representation(instance)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer += time.perf_counter() - start
+            metrics.serializer_depth -= 1
@@ -0,0 +1,256 @@
+"""
+Метрики в формате Prometheus. Каждый процесс копит счётчики и гистограммы
+в памяти под одной короткой блокировкой. Если задан API_METRICS['DIR'],
+процесс раз в FLUSH_INTERVAL секунд атомарно сохраняет свои значения в
+отдельный файл каталога, а /metrics суммирует файлы всех процессов, так
+что под gunicorn с несколькими воркерами видны общие значения
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, suppress
+
+from django.conf import settings
+from django.http import HttpResponse
+
+from api.instrumentation import (execute_wrapper, get_view_action,
+                                 QueryCounter)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+# Имя метрики: тип, описание и границы корзин для гистограмм
+METRICS = {
+    'yamdb_http_requests_total': (
+        'counter', 'Запросы к API по view, действию и статусу', None),
+    'yamdb_http_request_duration_seconds': (
+        'histogram', 'Время ответа API', LATENCY_BUCKETS),
+    'yamdb_db_queries_total': (
+        'counter', 'SQL-запросы при обработке запросов к API', None),
+    'yamdb_response_cache_total': (
+        'counter', 'Обращения к кешу ответов API (hit/miss)', None),
+    'yamdb_jwt_auth_failures_total': (
+        'counter', 'Отклонённые JWT-токены по причине', None),
+    'yamdb_throttled_requests_total': (
+        'counter', 'Запросы, отклонённые ограничением частоты', None),
+    'yamdb_email_send_seconds': (
+        'histogram', 'Время отправки писем', LATENCY_BUCKETS),
+    'yamdb_email_send_failures_total': (
+        'counter', 'Ошибки отправки писем', None),
+}
+
+
+class Registry:
+    """Значения метрик текущего процесса"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.values = {}
+        self.flushed_at = time.monotonic()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+        self.maybe_flush()
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.values.get(key)
+            if histogram is None:
+                histogram = self.values[key] = [0] * (len(buckets) + 3)
+            # Корзины, +Inf, сумма и количество
+            histogram[bisect_left(buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            return [[name, list(map(list, labels)),
+                     value[:] if isinstance(value, list) else value]
+                    for (name, labels), value in self.values.items()]
+
+    def get_path(self):
+        directory = settings.API_METRICS['DIR']
+        if not directory:
+            return None
+        return os.path.join(directory, f'metrics_{os.getpid()}.json')
+
+    def maybe_flush(self):
+        interval = settings.API_METRICS['FLUSH_INTERVAL']
+        if time.monotonic() - self.flushed_at < interval:
+            return
+        # Файл пишет один поток, остальные не ждут его в запросе
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self.flushed_at >= interval:
+                self._flush()
+        finally:
+            self.flush_lock.release()
+
+    def flush(self):
+        with self.flush_lock:
+            self._flush()
+
+    def _flush(self):
+        self.flushed_at = time.monotonic()
+        path = self.get_path()
+        if path is None:
+            return
+        directory = os.path.dirname(path)
+        temporary = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(
+                dir=directory, prefix='.metrics_', suffix='.tmp'
+            )
+            with os.fdopen(descriptor, 'w') as file:
+                json.dump(self.snapshot(), file)
+            os.replace(temporary, path)
+        except OSError:
+            # Ошибка записи метрик не должна ломать запрос
+            logger.exception('Не удалось сохранить метрики в %s', path)
+            if temporary is not None:
+                with suppress(OSError):
+                    os.remove(temporary)
+
+    def reset(self):
+        with self.lock:
+            self.values = {}
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+atexit.register(registry.flush)
+
+
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def collect():
+    """Значения метрик всех процессов, сложенные по имени и меткам"""
+    if registry.get_path() is None:
+        snapshots = [registry.snapshot()]
+    else:
+        registry.flush()
+        snapshots = []
+        pattern = os.path.join(settings.API_METRICS['DIR'], 'metrics_*.json')
+        for path in glob.glob(pattern):
+            try:
+                with open(path) as file:
+                    snapshots.append(json.load(file))
+            except (OSError, ValueError):
+                # Файл мог исчезнуть или быть повреждён при остановке
+                # воркера
+                continue
+    merged = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot:
+            if name not in METRICS:
+                continue
+            key = (name, tuple(map(tuple, labels)))
+            if key not in merged:
+                merged[key] = value
+            elif isinstance(value, list):
+                merged[key] = [a + b for a, b in zip(merged[key], value)]
+            else:
+                merged[key] += value
+    return merged
+
+
+def escape(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{escape(value)}"' for name, value in pairs
+    ) + '}'
+
+
+def format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Текст в формате экспозиции Prometheus 0.0.4"""
+    merged = collect()
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        samples = sorted((labels, value) for (metric, labels), value
+                         in merged.items() if metric == name)
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            if kind != 'histogram':
+                lines.append(f'{name}{format_labels(labels)} '
+                             f'{format_number(value)}')
+                continue
+            total = 0
+            for bound, count in zip((*buckets, float('inf')), value):
+                total += count
+                le = (('le', format_number(bound)),)
+                lines.append(f'{name}_bucket{format_labels(labels, le)} '
+                             f'{total}')
+            lines.append(f'{name}_sum{format_labels(labels)} '
+                         f'{format_number(value[-2])}')
+            lines.append(f'{name}_count{format_labels(labels)} '
+                         f'{value[-1]}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """Считает запросы к API, время ответа и SQL-запросы по view"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with execute_wrapper(counter):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        view_action = get_view_action(request)
+        if view_action is None:
+            return response
+        view, action = view_action
+        inc('yamdb_http_requests_total', view=view, action=action,
+            method=request.method, status=response.status_code)
+        observe('yamdb_http_request_duration_seconds', duration,
+                view=view, action=action)
+        if counter.count:
+            inc('yamdb_db_queries_total', counter.count, view=view,
+                action=action)
+        return response
@@ -0,0 +1,44 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Пагинация по ключу (id): страница выбирается условием по id без COUNT
+    и OFFSET, поэтому её стоимость не зависит от глубины
+    """
+    ordering = '-id'
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Пагинация по номеру страницы, которая по параметру ?pagination=cursor
+    переключается на KeysetPagination. Ссылки next/previous в режиме
+    курсора содержат параметр cursor и сохраняют выбранный режим, а старые
+    клиенты продолжают получать страницы с count
+    """
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+    keyset_class = KeysetPagination
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.keyset_mode
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_fields(self, view):
+        return (super().get_schema_fields(view)
+                + self.keyset_class().get_schema_fields(view))
@@ -0,0 +1,106 @@
+"""
+Сериализаторы только для чтения для list и retrieve. Строки читаются через
+values() (жанры страницы произведений - одним дополнительным запросом),
+а словари ответа собираются напрямую, без полей ModelSerializer. Ответ
+совпадает с TitleSerializer, ReviewSerializer и CommentSerializer
+"""
+from abc import ABCMeta, abstractmethod
+
+from rest_framework.fields import DateTimeField
+
+from api.instrumentation import TimedSerializerMixin
+from reviews.models import Title
+
+format_datetime = DateTimeField().to_representation
+
+
+class ValuesSerializer(metaclass=ABCMeta):
+    """Основа: lookups - поля values(), build строит словари ответа"""
+
+    lookups = ()
+
+    def __init__(self, instance=None, many=False, **kwargs):
+        self.instance = instance
+        self.many = many
+
+    @classmethod
+    def get_values(cls, queryset):
+        return queryset.values(*cls.lookups)
+
+    def prepare(self, rows):
+        """Загружает связанные данные для страницы строк"""
+
+    @abstractmethod
+    def build(self, rows):
+        """Список словарей ответа для строк values()"""
+
+    def to_representation(self, rows):
+        return self.build(rows)
+
+    @property
+    def data(self):
+        rows = list(self.instance) if self.many else [self.instance]
+        self.prepare(rows)
+        data = self.to_representation(rows)
+        return data if self.many else data[0]
+
+
+class TitleReadSerializer(TimedSerializerMixin, ValuesSerializer):
+    lookups = ('id', 'name', 'year', 'rating_sum', 'rating_count',
+               'description', 'category__name', 'category__slug')
+
+    def prepare(self, rows):
+        self.genres = {}
+        if not rows:
+            return
+        # Порядок жанров как у prefetch_related: Genre.Meta.ordering
+        genres = Title.genre.through.objects.filter(
+            title_id__in=[row['id'] for row in rows]
+        ).order_by('-genre_id').values_list('title_id', 'genre__name',
+                                            'genre__slug')
+        for title_id, name, slug in genres:
+            self.genres.setdefault(title_id, []).append(
+                {'name': name, 'slug': slug}
+            )
+
+    def build(self, rows):
+        return [{
+            'id': row['id'],
+            'name': row['name'],
+            'year': row['year'],
+            'rating': (row['rating_sum'] / row['rating_count']
+                       if row['rating_count'] else None),
+            'description': row['description'],
+            'genre': self.genres.get(row['id'], []),
+            'category': None if row['category__slug'] is None else {
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+            },
+        } for row in rows]
+
+
+class ReviewReadSerializer(TimedSerializerMixin, ValuesSerializer):
+    lookups = ('id', 'text', 'author__username', 'score', 'pub_date',
+               'title_id')
+
+    def build(self, rows):
+        return [{
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'score': row['score'],
+            'pub_date': format_datetime(row['pub_date']),
+            'title': row['title_id'],
+        } for row in rows]
+
+
+class CommentReadSerializer(TimedSerializerMixin, ValuesSerializer):
+    lookups = ('id', 'text', 'author__username', 'pub_date')
+
+    def build(self, rows):
+        return [{
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'pub_date': format_datetime(row['pub_date']),
+        } for row in rows]
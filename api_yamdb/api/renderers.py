@@ -0,0 +1,77 @@
+"""
+JSON-рендерер и парсер на orjson, если он установлен, иначе работают
+стандартные классы DRF. Ответ совпадает с JSONRenderer байт в байт:
+компактные разделители, символы вне ASCII не экранируются, кроме U+2028
+и U+2029, даты и десятичные числа кодирует JSONEncoder DRF. Отличается
+только запись float по модулю меньше 1e-4 или не меньше 1e16
+('0.00001' вместо '1e-05'), значение при этом то же. При отступах,
+ensure_ascii или ошибке orjson ответ строит JSONRenderer
+"""
+import codecs
+import re
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework import parsers, renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+UNSAFE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'),
+                     (b'\xe2\x80\xa9', b'\\u2029'))
+
+# orjson разбирает целые длиннее 64 бит как float, такие тела разбирает
+# json. Выражение находит и длинные дробные числа, для них ответ тот же
+LONG_NUMBER = re.compile(rb'\d{19,}')
+
+# Даты передаются в JSONEncoder: DRF пишет UTC как 'Z', а не '+00:00'
+OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+           if orjson is not None else None)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact or self.get_indent(
+                    accepted_media_type, renderer_context or {}
+                ) is not None):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            content = orjson.dumps(data, default=self.encoder.default,
+                                   option=OPTIONS)
+        except orjson.JSONEncodeError:
+            # Например, целые длиннее 64 бит
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        for separator, escaped in UNSAFE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+class JSONParser(parsers.JSONParser):
+
+    renderer_class = JSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        content = stream.read()
+        if LONG_NUMBER.search(content):
+            return super().parse(BytesIO(content), media_type,
+                                 parser_context)
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Текст ошибки должен совпадать с JSONParser
+            return super().parse(BytesIO(content), media_type,
+                                 parser_context)
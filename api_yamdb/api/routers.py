@@ -0,0 +1,120 @@
+"""
+Чтение с реплик. ReplicaMiddleware отмечает GET-запросы к ViewSet из
+API_REPLICAS['VIEWS'], а ViewSet вызывает read_from_replica, когда
+аутентификация и проверка прав уже прошли по основной базе. После этого
+ReplicaRouter отправляет чтения запроса на случайную реплику (базы
+replica_N из DB_REPLICAS). Остальные запросы и все записи идут в основную
+базу. После успешного запроса на изменение клиент на
+PIN_SECONDS секунд закрепляется за основной базой, чтобы сразу видеть
+свои изменения: по cookie и по токену из заголовка Authorization.
+Закрепление по токену хранится в кеше API_RESPONSE_CACHE; без общего
+кеша его не увидят другие воркеры, поэтому тогда запросы с токеном
+всегда читают из основной базы
+"""
+import hashlib
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from api import cache
+
+REPLICA_PREFIX = 'replica_'
+PIN_COOKIE = 'yamdb_primary'
+PIN_KEY = 'api:pin:{}'
+
+_replica_allowed = ContextVar('replica_allowed', default=False)
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def get_replicas():
+    return [alias for alias in connections.databases
+            if alias.startswith(REPLICA_PREFIX)]
+
+
+def using_replica():
+    """Чтения текущего запроса идут на реплику"""
+    return _use_replica.get()
+
+
+def read_from_replica():
+    """Направляет дальнейшие чтения запроса на реплику, если это разрешено"""
+    if _replica_allowed.get():
+        _use_replica.set(True)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if replicas and _use_replica.get():
+            return random.choice(replicas)
+        # Иначе Django взял бы базу объекта из подсказки instance, и
+        # связанные объекты прочитанного с реплики объекта читались бы
+        # с неё же
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db.startswith(REPLICA_PREFIX):
+            return False
+        return None
+
+
+def get_pin_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return PIN_KEY.format(hashlib.sha1(authorization.encode()).hexdigest())
+
+
+def is_pinned(request):
+    if PIN_COOKIE in request.COOKIES:
+        return True
+    key = get_pin_key(request)
+    if key is None:
+        return False
+    return not cache.shared() or cache.get_cache().get(key) is not None
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        allowed = _replica_allowed.set(False)
+        token = _use_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+            _replica_allowed.reset(allowed)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if (request.method in SAFE_METHODS and view_class is not None
+                and view_class.__name__ in settings.API_REPLICAS['VIEWS']
+                and get_replicas() and not is_pinned(request)):
+            _replica_allowed.set(True)
+
+    def pin(self, request, response):
+        seconds = settings.API_REPLICAS['PIN_SECONDS']
+        if not seconds or not get_replicas():
+            return
+        response.set_cookie(PIN_COOKIE, '1', max_age=seconds,
+                            httponly=True, samesite='Lax')
+        key = get_pin_key(request)
+        if key is not None and cache.shared():
+            cache.get_cache().set(key, 1, seconds)
@@ -0,0 +1,95 @@
+"""
+Полнотекстовый поиск произведений по названию и описанию.
+Индекс поддерживает сама база: в SQLite это таблица FTS5 с триггерами
+(reviews.search_index), в PostgreSQL - GIN-индекс по tsvector (миграция
+0003_title_search_index).
+Для остальных баз используется поиск icontains без ранжирования
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+WORD_RE = re.compile(r'\w+')
+
+
+def get_words(query):
+    return WORD_RE.findall(query.lower())
+
+
+class FallbackSearchBackend:
+    """Поиск подстрок без индекса: все слова в названии или описании"""
+
+    def search(self, queryset, query):
+        for word in get_words(query):
+            queryset = queryset.filter(
+                Q(name__icontains=word) | Q(description__icontains=word)
+            )
+        return queryset
+
+
+class SQLiteSearchBackend:
+    """Поиск по таблице FTS5 с ранжированием bm25 и поиском по префиксу"""
+    table = 'reviews_title_fts'
+
+    def search(self, queryset, query):
+        words = get_words(query)
+        if not words:
+            return queryset
+        # Каждое слово ищется как префикс, слова объединяются через AND
+        match = ' '.join(f'"{word}"*' for word in words)
+        return queryset.extra(
+            tables=[self.table],
+            where=[f'{self.table}.rowid = reviews_title.id',
+                   f'{self.table} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'{self.table}.rank'},
+            order_by=['search_rank', '-id'],
+        )
+
+
+class PostgreSQLSearchBackend:
+    """Поиск по tsvector с ранжированием ts_rank и поиском по префиксу"""
+    # Выражение должно совпадать с выражением GIN-индекса
+    vector = ("to_tsvector('simple', coalesce(reviews_title.name, '') "
+              "|| ' ' || coalesce(reviews_title.description, ''))")
+
+    def search(self, queryset, query):
+        words = get_words(query)
+        if not words:
+            return queryset
+        ts_query = ' & '.join(f'{word}:*' for word in words)
+        return queryset.extra(
+            where=[f"{self.vector} @@ to_tsquery('simple', %s)"],
+            params=[ts_query],
+            select={'search_rank': (f"ts_rank({self.vector}, "
+                                    f"to_tsquery('simple', %s))")},
+            select_params=[ts_query],
+            order_by=['-search_rank', '-id'],
+        )
+
+
+_backends = {}
+
+
+def get_search_backend():
+    """
+    Запоминается только поиск по индексу. Без индекса (например, до
+    миграции 0003) таблица проверяется снова при следующем поиске
+    """
+    vendor = connection.vendor
+    if vendor in _backends:
+        return _backends[vendor]
+    if vendor == 'sqlite' and (
+        SQLiteSearchBackend.table in connection.introspection.table_names()
+    ):
+        backend = _backends[vendor] = SQLiteSearchBackend()
+    elif vendor == 'postgresql':
+        backend = _backends[vendor] = PostgreSQLSearchBackend()
+    else:
+        backend = FallbackSearchBackend()
+    return backend
+
+
+def search_titles(queryset, query):
+    return get_search_backend().search(queryset, query)
@@ -1,16 +1,18 @@
 import re
 
-from django.db.models import Avg
 from rest_framework import validators
-from rest_framework.generics import get_object_or_404
 from rest_framework.relations import SlugRelatedField
-from rest_framework.serializers import (CharField, EmailField, ModelSerializer,
-                                        SerializerMethodField, ValidationError)
+from rest_framework.serializers import (CharField, EmailField, FloatField,
+                                        IntegerField, ModelSerializer,
+                                        MultipleChoiceField, Serializer,
+                                        SerializerMethodField,
+                                        ValidationError)
 
+from api.instrumentation import TimedSerializerMixin
 from reviews.models import Category, Comment, Genre, Review, Title, User
 
 
-class RegistrationsSerializer(ModelSerializer):
+class RegistrationsSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор для регистрацции нового пользователя"""
     username = CharField(
         max_length=150,
@@ -53,7 +55,7 @@ class GetTokenSerializer(ModelSerializer):
         return
 
 
-class UserSerializer(ModelSerializer):
+class UserSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор для модели кастомного пользователя"""
     email = EmailField(
         required=True,
@@ -66,7 +68,7 @@ class UserSerializer(ModelSerializer):
                   'role',)
 
 
-class MeSerializer(ModelSerializer):
+class MeSerializer(TimedSerializerMixin, ModelSerializer):
 
     class Meta:
         model = User
@@ -74,14 +76,19 @@ class MeSerializer(ModelSerializer):
                   'role',)
 
     def update(self, instance, validated_data):
-        user = get_object_or_404(User, username=instance)
-        print(user)
-        if user.role == 'user' and 'role' in validated_data:
-            validated_data.pop('role')
-        return super().update(instance, validated_data)
-
-
-class ReviewSerializer(ModelSerializer):
+        """Сохраняет только изменившиеся поля, роль меняют не все"""
+        if instance.role == User.AUTHENTICATED:
+            validated_data.pop('role', None)
+        changed = [field for field, value in validated_data.items()
+                   if getattr(instance, field) != value]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        if changed:
+            instance.save(update_fields=changed)
+        return instance
+
+
+class ReviewSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор модели Review."""
     author = SlugRelatedField(slug_field='username', read_only=True)
     text = CharField(allow_blank=True, required=True)
@@ -92,19 +99,19 @@ class ReviewSerializer(ModelSerializer):
 
     def validate(self, data):
         """Проверка на лимит в 1 отзыв на 1 произведение."""
-        author = self.context['request'].user
-        title = self.context['view'].kwargs['title_id']
-        if (
-            self.context['request'].method == 'POST'
-            and Review.objects.filter(author=author, title=title).exists()
-        ):
+        request = self.context['request']
+        if request.method != 'POST':
+            return data
+        # Произведение уже разрешено и закешировано во ViewSet
+        title = self.context['view'].get_parent()
+        if Review.objects.filter(author=request.user, title=title).exists():
             raise ValidationError(
                 'Вы уже оставляли отзыв к данному произведению!'
             )
         return data
 
 
-class CommentSerializer(ModelSerializer):
+class CommentSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор модели Comment."""
     author = SlugRelatedField(read_only=True, slug_field='username')
 
@@ -113,7 +120,7 @@ class CommentSerializer(ModelSerializer):
         model = Comment
 
 
-class CategorySerializer(ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор категорий произведений"""
 
     class Meta:
@@ -121,7 +128,7 @@ class CategorySerializer(ModelSerializer):
         fields = ('name', 'slug',)
 
 
-class GenreSerializer(ModelSerializer):
+class GenreSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор жанра произведения"""
 
     class Meta:
@@ -129,9 +136,9 @@ class GenreSerializer(ModelSerializer):
         fields = ('name', 'slug',)
 
 
-class TitleSerializer(ModelSerializer):
+class TitleSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор списка произведений"""
-    rating = SerializerMethodField()
+    rating = FloatField(read_only=True)
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
 
@@ -140,11 +147,8 @@ class TitleSerializer(ModelSerializer):
         fields = ('id', 'name', 'year', 'rating', 'description', 'genre',
                   'category',)
 
-    def get_rating(self, obj):
-        return obj.reviews.all().aggregate(Avg('score'))['score__avg']
-
 
-class TitleCreateSerializer(ModelSerializer):
+class TitleCreateSerializer(TimedSerializerMixin, ModelSerializer):
     """Сериализатор для создания/обновления произведения"""
     genre = SlugRelatedField(queryset=Genre.objects.all(),
                              slug_field='slug', many=True)
@@ -154,3 +158,12 @@ class TitleCreateSerializer(ModelSerializer):
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'description', 'genre', 'category',)
+
+
+class SuggestSerializer(Serializer):
+    """Параметры запроса подсказок для автодополнения"""
+    q = CharField(max_length=100, trim_whitespace=False)
+    limit = IntegerField(min_value=1, max_value=50, default=10)
+    type = MultipleChoiceField(
+        choices=('title', 'genre', 'category'), required=False
+    )
@@ -0,0 +1,101 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from api import suggest
+from api.authentication import get_user_key
+from api.cache import get_cache, invalidate, object_version
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_model(sender, instance, **kwargs):
+    model_name = sender._meta.model_name
+    invalidate(model_name, object_version(model_name, instance.pk))
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate('title', object_version('title', instance.pk))
+    elif pk_set:
+        invalidate('title', *(object_version('title', pk) for pk in pk_set))
+    else:
+        # clear() со стороны жанра: затронутые произведения неизвестны
+        invalidate('title', 'genre')
+
+
+def invalidate_rating(*title_ids):
+    invalidate('title', *(object_version('title', title_id)
+                          for title_id in set(title_ids)
+                          if title_id is not None))
+
+
+@receiver(post_save, sender=Review)
+def invalidate_title_rating(sender, instance, created, **kwargs):
+    # Сигнал приходит до того, как Review.save обновит _loaded_rating,
+    # поэтому здесь ещё видны загруженные из БД произведение и оценка
+    invalidate('review', object_version('review', instance.pk))
+    loaded = getattr(instance, '_loaded_rating', None)
+    if created or loaded != (instance.title_id, instance.score):
+        invalidate_rating(instance.title_id, loaded[0] if loaded else None)
+
+
+@receiver(post_delete, sender=Review)
+def invalidate_deleted_rating(sender, instance, **kwargs):
+    invalidate('review', object_version('review', instance.pk))
+    invalidate_rating(instance.title_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_names(sender, created, **kwargs):
+    # Отзывы и комментарии выводят username автора, а у нового
+    # пользователя их ещё нет
+    if not created:
+        invalidate('user')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Роль, активность и остальные поля пользователя читаются из кеша
+    # аутентификации, поэтому запись сбрасывается после коммита
+    key = get_user_key(getattr(instance, api_settings.USER_ID_FIELD))
+    transaction.on_commit(lambda: get_cache().delete(key))
+
+
+# Индекс подсказок зависит только от названий. Версия подсказок
+# сдвигается раньше, чем обновляется локальный индекс, поэтому он
+# запоминает уже новую версию
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Title)
+def update_suggestions(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_loaded_name', None) == (
+        instance.name
+    ):
+        return
+    instance._loaded_name = instance.name
+    kind = sender._meta.model_name
+    invalidate(suggest.VERSION)
+    transaction.on_commit(lambda: suggest.index.update(kind, instance))
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+def remove_suggestions(sender, instance, **kwargs):
+    kind, pk = sender._meta.model_name, instance.pk
+    invalidate(suggest.VERSION)
+    transaction.on_commit(lambda: suggest.index.remove(kind, pk))
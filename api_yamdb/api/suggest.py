@@ -0,0 +1,133 @@
+"""
+Индекс подсказок для автодополнения по названиям произведений, жанров и
+категорий. Хранится в памяти процесса как отсортированный список ключей,
+поиск по префиксу выполняется через bisect без обращения к базе. Запись
+заменяет список целиком, поэтому поиск читает его без блокировки
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from api.cache import get_versions
+from reviews.models import Category, Genre, Title
+
+# Версия сдвигается только при изменении названий (api/signals.py), а не
+# при любой записи в эти модели, например при пересчёте рейтинга
+VERSION = 'suggest'
+
+# Максимальный возраст индекса: ограничивает устаревание, если запись из
+# другого процесса совпала по времени с локальным обновлением индекса
+MAX_AGE = 300
+
+WORD_START_RE = re.compile(r'\b\w', re.UNICODE)
+
+SOURCES = {
+    'title': (Title, ('id', 'name')),
+    'genre': (Genre, ('slug', 'name')),
+    'category': (Category, ('slug', 'name')),
+}
+
+
+def get_keys(name):
+    """Ключи для поиска по началу каждого слова названия"""
+    name = name.lower()
+    return {name[match.start():] for match in WORD_START_RE.finditer(name)}
+
+
+class SuggestIndex:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (отсортированные ключи, элементы) заменяются одним присваиванием
+        self.data = ([], {})
+        self.versions = None
+        self.built_at = 0
+
+    def build(self):
+        entries, items = [], {}
+        for kind, (model, fields) in SOURCES.items():
+            for pk, *values in model.objects.values_list(
+                'pk', *fields
+            ).iterator():
+                item = dict(zip(fields, values), type=kind)
+                items[kind, pk] = item
+                entries.extend(
+                    (key, kind, pk) for key in get_keys(item['name'])
+                )
+        entries.sort()
+        with self.lock:
+            self.data = (entries, items)
+            self.versions = get_versions([VERSION])
+            self.built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        # Версия сдвигается при записи в любом процессе, поэтому изменения
+        # названий из других воркеров приводят к перестроению индекса
+        if (self.versions != get_versions([VERSION])
+                or time.monotonic() - self.built_at > MAX_AGE):
+            self.build()
+
+    def update(self, kind, obj):
+        with self.lock:
+            if self.versions is None:
+                # Индекс ещё не построен и будет загружен целиком
+                return
+            entries, items = self._remove(kind, obj.pk)
+            model, fields = SOURCES[kind]
+            item = {field: getattr(obj, field) for field in fields}
+            item['type'] = kind
+            items[kind, obj.pk] = item
+            for key in get_keys(item['name']):
+                insort(entries, (key, kind, obj.pk))
+            self.data = (entries, items)
+            self.versions = get_versions([VERSION])
+
+    def remove(self, kind, pk):
+        with self.lock:
+            if self.versions is None:
+                return
+            self.data = self._remove(kind, pk)
+            self.versions = get_versions([VERSION])
+
+    def _remove(self, kind, pk):
+        """Копии ключей и элементов без объекта"""
+        entries, items = self.data
+        entries, items = entries[:], dict(items)
+        item = items.pop((kind, pk), None)
+        if item is None:
+            return entries, items
+        for key in get_keys(item['name']):
+            position = bisect_left(entries, (key, kind, pk))
+            if (position < len(entries)
+                    and entries[position] == (key, kind, pk)):
+                del entries[position]
+        return entries, items
+
+    def search(self, prefix, limit=10, kinds=None):
+        prefix = prefix.lower()
+        if not prefix:
+            return []
+        entries, items = self.data
+        result, seen = [], set()
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and len(result) < limit:
+            key, kind, pk = entries[position]
+            if not key.startswith(prefix):
+                break
+            position += 1
+            if (kinds and kind not in kinds) or (kind, pk) in seen:
+                continue
+            item = items.get((kind, pk))
+            if item is not None:
+                seen.add((kind, pk))
+                result.append(item)
+        return result
+
+
+index = SuggestIndex()
+
+
+def suggest(prefix, limit=10, kinds=None):
+    index.ensure_fresh()
+    return index.search(prefix, limit, kinds)
@@ -0,0 +1,168 @@
+"""
+Ограничение частоты запросов к регистрации и получению токена по алгоритму
+token bucket: у каждого IP, email и username есть корзина на N токенов,
+которая пополняется со скоростью N за период. Запрос забирает токен, пустая
+корзина означает ответ 429 с заголовком Retry-After.
+
+Проверка выполняется до валидации сериализатора и обращений к базе.
+Счётчики хранятся в памяти процесса, а если задан API_THROTTLE['ALIAS'] -
+в общем кеше Django, чтобы лимит действовал на все воркеры
+"""
+import hashlib
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from api import metrics
+
+THROTTLE_KEY = 'api:throttle:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'20/min' -> (20, 20 / 60): размер корзины и токенов в секунду"""
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+def take(state, capacity, rate, now):
+    """
+    Забирает токен из корзины. Возвращает новое состояние (токены, время
+    обновления) и сколько секунд ждать, если токенов нет
+    """
+    tokens, updated = state or (capacity, now)
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0.0
+    return (tokens, now), (1 - tokens) / rate
+
+
+class MemoryStore:
+    """Корзины в памяти процесса, не больше MAX_KEYS штук"""
+
+    MAX_KEYS = 100000
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = OrderedDict()
+
+    def consume(self, key, capacity, rate):
+        now = time.time()
+        with self.lock:
+            state, delay = take(self.buckets.get(key), capacity, rate, now)
+            self.buckets[key] = state
+            self.buckets.move_to_end(key)
+            # Дольше всех не использовались корзины в начале словаря,
+            # за это время они, скорее всего, уже заполнились
+            while len(self.buckets) > self.MAX_KEYS:
+                self.buckets.popitem(last=False)
+        return delay
+
+    def reset(self):
+        with self.lock:
+            self.buckets = OrderedDict()
+
+
+class CacheStore:
+    """
+    Корзины в общем кеше. Чтение и запись не атомарны, поэтому при
+    одновременных запросах лимит может быть превышен на число воркеров
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def consume(self, key, capacity, rate):
+        state, delay = take(self.cache.get(key), capacity, rate, time.time())
+        # Полная корзина не отличается от отсутствующей
+        timeout = int((capacity - state[0]) / rate) + 1
+        self.cache.set(key, state, timeout)
+        return delay
+
+
+memory_store = MemoryStore()
+
+
+def get_store():
+    alias = settings.API_THROTTLE['ALIAS']
+    if not alias:
+        return memory_store
+    return CacheStore(caches[alias])
+
+
+class TokenBucketThrottle(BaseThrottle, metaclass=ABCMeta):
+    """Лимит API_THROTTLE['RATES'][scope] на значение get_value"""
+
+    scope = None
+
+    @abstractmethod
+    def get_value(self, request):
+        """Значение, по которому считается лимит; None - без лимита"""
+
+    def allow_request(self, request, view):
+        self.delay = 0.0
+        options = settings.API_THROTTLE
+        if not options['ENABLED']:
+            return True
+        value = self.get_value(request)
+        if not value:
+            return True
+        capacity, rate = parse_rate(options['RATES'][self.scope])
+        digest = hashlib.sha1(value.encode()).hexdigest()
+        self.delay = get_store().consume(
+            THROTTLE_KEY.format(self.scope, digest), capacity, rate
+        )
+        if self.delay:
+            metrics.inc('yamdb_throttled_requests_total', scope=self.scope)
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+class IPThrottle(TokenBucketThrottle):
+    """
+    Лимит по IP клиента. X-Forwarded-For задаёт сам клиент, поэтому он
+    учитывается только за API_THROTTLE['NUM_PROXIES'] доверенными прокси:
+    берётся адрес, который добавил самый дальний из них
+    """
+    scope = 'ip'
+
+    def get_value(self, request):
+        num_proxies = settings.API_THROTTLE['NUM_PROXIES']
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if num_proxies and forwarded:
+            addresses = [address.strip() for address in forwarded.split(',')]
+            return addresses[-min(num_proxies, len(addresses))]
+        return request.META.get('REMOTE_ADDR')
+
+
+class DataFieldThrottle(TokenBucketThrottle):
+    """Лимит по полю тела запроса; тело разбирается без валидации"""
+
+    field = None
+
+    def get_value(self, request):
+        data = request.data
+        if not isinstance(data, dict):
+            return None
+        value = data.get(self.field)
+        if not isinstance(value, str):
+            return None
+        return value.strip().lower()
+
+
+class EmailThrottle(DataFieldThrottle):
+    scope = 'email'
+    field = 'email'
+
+
+class UsernameThrottle(DataFieldThrottle):
+    scope = 'username'
+    field = 'username'
@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                       get_token, registrations, ReviewViewSet,
-                       TitleViewSet, UserViewSet)
+from api.views import (cache_stats, CategoryViewSet, CommentViewSet,
+                       GenreViewSet, get_token, instrumentation_stats,
+                       registrations, ReviewViewSet, suggest, TitleViewSet,
+                       UserViewSet)
 
 router_v1 = DefaultRouter()
 router_v1.register('users', UserViewSet, basename='users')
@@ -24,4 +25,7 @@ urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/signup/', registrations),
     path('v1/auth/token/', get_token),
+    path('v1/cache/stats/', cache_stats),
+    path('v1/instrumentation/', instrumentation_stats),
+    path('v1/suggest/', suggest),
 ]
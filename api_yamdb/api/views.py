@@ -1,19 +1,33 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view,
+                                       authentication_classes,
+                                       permission_classes, throttle_classes)
 from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from api import cache, instrumentation
+from api import suggest as suggestions
 from api.custom_viewsets import (
     ListCreateDestroyViewSet,
+    ParentObjectMixin,
+    ReplicaReadMixin,
     RetrieveListCreateDestroyPartialUpdateViewSet,
+    ValuesReadMixin,
+    VersionedListMixin,
+    VersionedObjectMixin,
 )
 from api.filters import TitleFilter
+from api.pagination import PageNumberOrKeysetPagination
 from api.permissions import IsAdmin, IsModerator, IsOwner, IsSuperuser, ReadOnly
+from api.read_serializers import (
+    CommentReadSerializer,
+    ReviewReadSerializer,
+    TitleReadSerializer,
+)
 from api.serializers import (
     CategorySerializer,
     CommentSerializer,
@@ -22,19 +36,24 @@ from api.serializers import (
     MeSerializer,
     RegistrationsSerializer,
     ReviewSerializer,
+    SuggestSerializer,
     TitleCreateSerializer,
     TitleSerializer,
     UserSerializer,
 )
-from reviews.models import Category, Genre, Review, Title, User
+from api.throttling import EmailThrottle, IPThrottle, UsernameThrottle
+from reviews import outbox
+from reviews.models import Category, Comment, Genre, Review, Title, User
 
 
 @api_view(["POST"])
+@authentication_classes([])
 @permission_classes(
     [
         permissions.AllowAny,
     ]
 )
+@throttle_classes([IPThrottle, EmailThrottle, UsernameThrottle])
 def registrations(request):
     """Метод регистрации пользователей."""
     serializer = RegistrationsSerializer(data=request.data)
@@ -43,22 +62,24 @@ def registrations(request):
     username = serializer.data["username"]
     user, _ = User.objects.get_or_create(email=email, username=username)
     token = default_token_generator.make_token(user)
-    send_mail(
+    # Письмо отправляется в фоне, ответ не ждёт SMTP-сервер
+    outbox.enqueue(
         "Ваш confirmation_code",
         f"Для пользователя {username} выпущен " f"confirmation_code: {token}",
         settings.EMAIL_SENDER,
         [f"{email}"],
-        fail_silently=False,
     )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
+@authentication_classes([])
 @permission_classes(
     [
         permissions.AllowAny,
     ]
 )
+@throttle_classes([IPThrottle, UsernameThrottle])
 def get_token(request):
     serializer = GetTokenSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
@@ -73,6 +94,39 @@ def get_token(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["GET"])
+@permission_classes([IsAdmin | IsSuperuser])
+def cache_stats(request):
+    """Счётчики попаданий и промахов кеша ответов текущего процесса."""
+    return Response(cache.get_stats(), status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdmin | IsSuperuser])
+def instrumentation_stats(request):
+    """Гистограммы времени и SQL-запросов по view текущего процесса."""
+    return Response(instrumentation.store.dump(), status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes(
+    [
+        permissions.AllowAny,
+    ]
+)
+def suggest(request):
+    """Подсказки по началу названий произведений, жанров и категорий."""
+    serializer = SuggestSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    results = suggestions.suggest(
+        serializer.validated_data["q"],
+        serializer.validated_data["limit"],
+        serializer.validated_data.get("type"),
+    )
+    return Response(results, status=status.HTTP_200_OK)
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """ViewSet модели кастомного пользователя"""
 
@@ -90,8 +144,8 @@ class UserViewSet(viewsets.ModelViewSet):
         ],
     )
     def me_endpoint(self, request):
+        # Пользователь уже загружен при аутентификации
         user = request.user
-        user = get_object_or_404(User, username=user.username)
         if request.method == "GET":
             serializer = MeSerializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -106,63 +160,60 @@ class UserViewSet(viewsets.ModelViewSet):
         )
 
 
-class ReviewViewSet(RetrieveListCreateDestroyPartialUpdateViewSet):
+class ReviewViewSet(ReplicaReadMixin, ParentObjectMixin,
+                    VersionedListMixin, VersionedObjectMixin, ValuesReadMixin,
+                    RetrieveListCreateDestroyPartialUpdateViewSet):
     """
     ViewSet модели Review. Позволяет работать с постами.
     Имеет функции: CRUD
     """
 
+    queryset = Review.objects.select_related("author")
     serializer_class = ReviewSerializer
+    read_serializer_class = ReviewReadSerializer
+    pagination_class = PageNumberOrKeysetPagination
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly,
         (ReadOnly | IsAdmin | IsModerator | IsOwner),
     ]
+    parent_model = Title
+    parent_field = "title"
+    parent_lookups = {"id": "title_id"}
+    version_models = ("review", "user", "title")
+    object_version_models = ("user",)
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs["title_id"])
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user, title=self.get_parent())
 
-    def get_queryset(self):
-        # Добавил условие, чтобы в консоли не отображалась ошибка при
-        # генерации документации yasg
-        if getattr(self, "swagger_fake_view", False):
-            return Title.objects.none()
-        title = get_object_or_404(Title, id=self.kwargs["title_id"])
-        return title.reviews.all()
 
-
-class CommentViewSet(RetrieveListCreateDestroyPartialUpdateViewSet):
+class CommentViewSet(ReplicaReadMixin, ParentObjectMixin,
+                     VersionedListMixin, VersionedObjectMixin, ValuesReadMixin,
+                     RetrieveListCreateDestroyPartialUpdateViewSet):
     """
     ViewSet модели Comment. Позволяет работать с комментариями пользователей.
     Имеет функции: CRUD
     """
 
+    queryset = Comment.objects.select_related("author")
     serializer_class = CommentSerializer
+    read_serializer_class = CommentReadSerializer
+    pagination_class = PageNumberOrKeysetPagination
     permission_classes = [
         permissions.IsAuthenticatedOrReadOnly,
         (ReadOnly | IsAdmin | IsModerator | IsOwner),
     ]
+    parent_model = Review
+    parent_field = "review"
+    parent_lookups = {"id": "review_id", "title_id": "title_id"}
+    version_models = ("comment", "user", "review")
+    object_version_models = ("user",)
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review, title_id=self.kwargs["title_id"], id=self.kwargs["review_id"]
-        )
-        serializer.save(author=self.request.user, review=review)
-
-    def get_queryset(self):
-        # Добавил условие, чтобы в консоли не отображалась ошибка при
-        # генерации документации yasg
-        if getattr(self, "swagger_fake_view", False):
-            return Review.objects.none()
-        review = get_object_or_404(
-            Review,
-            title_id=self.kwargs["title_id"],
-            id=self.kwargs["review_id"],
-        )
-        return review.comments.all()
+        serializer.save(author=self.request.user, review=self.get_parent())
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(ReplicaReadMixin, VersionedListMixin,
+                      ListCreateDestroyViewSet):
     """
     ViewSet предназначен для просмотра списка категорий (типы)
     произведений, создания и удаления категории
@@ -174,9 +225,12 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     search_fields = ("name",)
     lookup_field = "slug"
     permission_classes = [IsAdmin | IsSuperuser | ReadOnly]
+    version_models = ("category",)
+    cache_responses = True
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(ReplicaReadMixin, VersionedListMixin,
+                   ListCreateDestroyViewSet):
     """
     ViewSet предназначен для просмотра списка категорий жанров, создания и
     удаления жанра
@@ -188,19 +242,31 @@ class GenreViewSet(ListCreateDestroyViewSet):
     search_fields = ("name",)
     permission_classes = [IsAdmin | IsSuperuser | ReadOnly]
     lookup_field = "slug"
+    version_models = ("genre",)
+    cache_responses = True
 
 
-class TitleViewSet(RetrieveListCreateDestroyPartialUpdateViewSet):
+class TitleViewSet(ReplicaReadMixin, VersionedListMixin, VersionedObjectMixin,
+                   ValuesReadMixin,
+                   RetrieveListCreateDestroyPartialUpdateViewSet):
     """
     ViewSet предоставляет CRUD действия с произведения, к которым пишут
     отзывы (определённый фильм, книга или песенка).
     """
 
-    queryset = Title.objects.all()
+    # Категория подтягивается JOIN'ом, жанры одним запросом на страницу,
+    # а рейтинг хранится в самой строке произведения
+    queryset = Title.objects.select_related("category").prefetch_related(
+        "genre"
+    )
     serializer_class = TitleSerializer
+    read_serializer_class = TitleReadSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     permission_classes = [IsAdmin | IsSuperuser | ReadOnly]
+    version_models = ("title", "genre", "category")
+    object_version_models = ("genre", "category")
+    cache_responses = True
 
     def get_serializer_class(self):
         # в зависимости от действия выбираем тот или иной сериалайзер
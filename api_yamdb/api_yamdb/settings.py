@@ -43,7 +43,17 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.JWTAuthentication',
+    ],
+    # JSON на orjson, если он установлен (api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -54,6 +64,9 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.instrumentation.InstrumentationMiddleware',
+    'api.routers.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,13 +100,134 @@ WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 # Database
 
+# Соединение переиспользуется запросами одного потока DB_CONN_MAX_AGE
+# секунд (0 - новое соединение на каждый запрос), так что воркер держит
+# не больше соединений, чем у него потоков (gunicorn --threads или пулы
+# API_ASGI). DB_HEALTH_CHECKS проверяет соединение перед запросом
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+    }
+}
+
+# Реплики для чтения (api/routers.py): через запятую пути к файлам
+# SQLite или хосты СУБД. Копии SQLite обновляет команда sync_replica
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica_{number}'] = dict(
+        DATABASES['default'],
+        **{'NAME' if 'sqlite' in DATABASES['default']['ENGINE']
+           else 'HOST': replica.strip()},
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+# Чтения этих ViewSet в GET-запросах идут на реплики. После изменения
+# клиент PIN_SECONDS секунд читает из основной базы, а ответы, прочитанные
+# с реплики, кешируются не дольше CACHE_TIMEOUT секунд
+API_REPLICAS = {
+    'VIEWS': ('TitleViewSet', 'ReviewViewSet', 'CommentViewSet',
+              'GenreViewSet', 'CategoryViewSet'),
+    'PIN_SECONDS': int(os.getenv('DB_REPLICA_PIN_SECONDS', 5)),
+    'CACHE_TIMEOUT': int(os.getenv('DB_REPLICA_CACHE_TIMEOUT', 5)),
+}
+
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', 'true').lower() == 'true'
+
+# PRAGMA новых соединений с SQLite: WAL позволяет читать во время записи,
+# busy_timeout - ждать блокировку вместо ошибки. DB_SQLITE_TUNING=false
+# оставляет настройки SQLite по умолчанию
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': int(os.getenv('DB_SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': int(os.getenv('DB_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+} if os.getenv('DB_SQLITE_TUNING', 'true').lower() == 'true' else {}
+
+
+# Cache
+# По умолчанию кеш локальный для процесса. При нескольких воркерах кеш
+# должен быть общим (например, django_redis.cache.RedisCache), иначе
+# инвалидация из одного воркера не видна остальным
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yamdb'),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+        },
     }
 }
 
+# Кеш ответов (api/cache.py), по умолчанию в памяти процесса. Ключ
+# ответа содержит версии моделей, которые хранятся в общем кеше, а без
+# него - в базе, поэтому изменение в одном воркере видно остальным.
+# Пустой API_RESPONSE_CACHE_ALIAS выключает кеш ответов. SHARED задаёт,
+# общий ли кеш, явно; по умолчанию это определяется по BACKEND
+API_RESPONSE_CACHE = {
+    'ALIAS': os.getenv('API_RESPONSE_CACHE_ALIAS', 'default') or None,
+    'TIMEOUT': int(os.getenv('API_RESPONSE_CACHE_TIMEOUT', 300)),
+    'SHARED': None,
+}
+
+# Пользователь из JWT-токена на чтениях кешируется на TIMEOUT секунд в
+# кеше API_RESPONSE_CACHE (только общем), чтобы не читать его из базы на
+# каждом запросе
+API_USER_CACHE = {
+    'TIMEOUT': int(os.getenv('API_USER_CACHE_TIMEOUT', 60)),
+}
+
+# Лимиты регистрации и получения токена (api/throttling.py): N запросов
+# за период, до N подряд. Без ALIAS счётчики хранятся в памяти процесса,
+# при нескольких воркерах нужен общий кеш. IP клиента берётся из
+# X-Forwarded-For только за NUM_PROXIES доверенными прокси, иначе из
+# REMOTE_ADDR
+API_THROTTLE = {
+    'ENABLED': os.getenv('API_THROTTLE_ENABLED', 'true').lower() == 'true',
+    'ALIAS': os.getenv('API_THROTTLE_CACHE'),
+    'NUM_PROXIES': int(os.getenv('API_THROTTLE_NUM_PROXIES', 0)),
+    'RATES': {
+        'ip': os.getenv('API_THROTTLE_IP_RATE', '20/min'),
+        'email': os.getenv('API_THROTTLE_EMAIL_RATE', '5/hour'),
+        'username': os.getenv('API_THROTTLE_USERNAME_RATE', '10/hour'),
+    },
+}
+
+# Пулы потоков ASGI-приложения (api/asgi.py). GET-запросы к READ_PATHS
+# выполняются в отдельном пуле из READ_WORKERS потоков, остальные - в
+# пуле из WORKERS потоков
+API_ASGI = {
+    'READ_WORKERS': int(os.getenv('API_ASGI_READ_WORKERS', 16)),
+    'WORKERS': int(os.getenv('API_ASGI_WORKERS', 4)),
+    'READ_PATHS': r'^/api/v1/titles/(\d+/(reviews/(\d+/comments/)?)?)?$',
+}
+
+# Доля запросов, для которых замеряются время, SQL-запросы и сериализация
+# (заголовок Server-Timing и /api/v1/instrumentation/)
+API_INSTRUMENTATION = {
+    'SAMPLE_RATE': float(os.getenv('API_INSTRUMENTATION_SAMPLE_RATE', 0.1)),
+}
+
+# Метрики Prometheus (/metrics). При нескольких воркерах нужен общий
+# каталог DIR: каждый процесс сохраняет туда свои значения раз в
+# FLUSH_INTERVAL секунд, а /metrics складывает значения всех процессов
+API_METRICS = {
+    'DIR': os.getenv('API_METRICS_DIR'),
+    'FLUSH_INTERVAL': float(os.getenv('API_METRICS_FLUSH_INTERVAL', 1)),
+}
+
 
 # Password validation
 
@@ -136,3 +270,15 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 EMAIL_SENDER = 'from@example.com'
+
+# Очередь исходящих писем (reviews/outbox.py). MODE: thread - отправка
+# фоновым потоком процесса, command - отдельным процессом send_outbox,
+# eager - сразу после коммита
+EMAIL_OUTBOX = {
+    'MODE': os.getenv('EMAIL_OUTBOX_MODE', 'thread'),
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    # Задержка перед повтором в секундах удваивается с каждой попыткой
+    'BACKOFF': 30,
+    'BACKOFF_MAX': 3600,
+}
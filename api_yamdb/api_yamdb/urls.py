@@ -2,11 +2,13 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
 
+from api.metrics import metrics_view
 from api_yamdb.yasg import urlpatterns as api_doc
 
 urlpatterns = [
     path('api/', include('api.urls')),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view),
     path(
         'redoc/',
         TemplateView.as_view(template_name='redoc.html'),
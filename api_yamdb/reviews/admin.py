@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (Category, Comment, Genre, OutgoingEmail, Review,
+                            Title, User)
 
 
 class ReviewAdmin(admin.ModelAdmin):
@@ -57,9 +58,17 @@ class UserAdmin(admin.ModelAdmin):
     list_display = ('username', "role", 'bio')
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'subject', 'recipients', 'status', 'attempts',
+                    'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('recipients',)
+
+
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Category, CategoryAdmin)
 admin.site.register(Genre, GenreAdmin)
 admin.site.register(Title, TitleAdmin)
 admin.site.register(User, UserAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
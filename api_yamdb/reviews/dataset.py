@@ -0,0 +1,455 @@
+"""
+Описание таблиц датасета static/data, загрузка CSV в базу пачками и
+потоковая выгрузка базы обратно в CSV/NDJSON
+"""
+import csv
+import io
+import json
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.utils.functional import cached_property
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+CHECKPOINT_DIR = os.path.join(settings.BASE_DIR, '.import_checkpoints')
+
+
+class Table:
+    """
+    Соответствие CSV-файла модели: колонка CSV -> attname поля. Остальные
+    поля модели (extra_fields) выгружаются в колонки с именем attname
+    после колонок датасета и загружаются, если такая колонка есть в файле,
+    поэтому выгрузка export_dataset загружается обратно без потерь
+    """
+
+    def __init__(self, name, filename, model, columns, defaults=None):
+        self.name = name
+        self.filename = filename
+        self.model = model
+        self.columns = columns
+        self.defaults = defaults or {}
+
+    def __repr__(self):
+        return f'<Table {self.name}>'
+
+    @cached_property
+    def fields(self):
+        return {column: self.model._meta.get_field(attname)
+                for column, attname in self.columns.items()}
+
+    @cached_property
+    def extra_fields(self):
+        covered = set(self.columns.values())
+        return {field.attname: field
+                for field in self.model._meta.concrete_fields
+                if field.attname not in covered}
+
+    @cached_property
+    def export_columns(self):
+        """Все поля модели: колонка -> attname"""
+        return dict(self.columns,
+                    **{column: column for column in self.extra_fields})
+
+    @cached_property
+    def foreign_keys(self):
+        """Колонки со ссылками на другие модели: колонка -> модель"""
+        return {column: field.related_model
+                for column, field in self.fields.items()
+                if field.is_relation}
+
+    @property
+    def dependencies(self):
+        """Имена таблиц, на которые ссылается эта таблица"""
+        related = set(self.foreign_keys.values())
+        return {table.name for table in TABLES if table.model in related}
+
+    def to_object(self, row):
+        values = {}
+        for column, field in self.fields.items():
+            values[field.attname] = to_python(field, row[column])
+        for column, field in self.extra_fields.items():
+            if column in row:
+                values[field.attname] = to_python(field, row[column])
+        defaults = {attname: value for attname, value in self.defaults.items()
+                    if attname not in values}
+        return self.model(**values, **defaults)
+
+    def begin(self):
+        """Подготовка к загрузке в текущем процессе"""
+
+    def accept(self, obj):
+        """Нужно ли вставлять объект; False - дубликат"""
+        return True
+
+    def insert(self, objects, batch_size, ignore_conflicts=False):
+        self.model.objects.bulk_create(objects, batch_size=batch_size,
+                                       ignore_conflicts=ignore_conflicts)
+
+
+def to_python(field, value):
+    if value == '':
+        return None if field.null else ''
+    return field.to_python(value)
+
+
+class ThroughTable(Table):
+    """
+    Промежуточная таблица ManyToMany. Повторяющиеся пары пропускаются,
+    а в PostgreSQL строки вставляются через COPY FROM STDIN
+    """
+
+    def __init__(self, name, filename, model, columns, pair):
+        super().__init__(name, filename, model, columns)
+        self.pair = pair
+
+    def begin(self):
+        # При возобновлении часть пар уже в базе
+        self.seen = set(self.model.objects.values_list(*self.pair).iterator())
+
+    def accept(self, obj):
+        key = tuple(getattr(obj, attname) for attname in self.pair)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def insert(self, objects, batch_size, ignore_conflicts=False):
+        if connection.vendor == 'postgresql' and not ignore_conflicts:
+            copy_insert(self.model, objects)
+        else:
+            super().insert(objects, batch_size, ignore_conflicts)
+
+
+# Таблицы перечислены в порядке зависимостей: ссылки только на предыдущие
+TABLES = [
+    Table('category', 'category.csv', Category,
+          {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    Table('genre', 'genre.csv', Genre,
+          {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    Table('titles', 'titles.csv', Title,
+          {'id': 'id', 'name': 'name', 'year': 'year',
+           'category': 'category_id'}),
+    ThroughTable('genre_title', 'genre_title.csv', Title.genre.through,
+                 {'id': 'id', 'title_id': 'title_id', 'genre_id': 'genre_id'},
+                 pair=('title_id', 'genre_id')),
+    Table('users', 'users.csv', User,
+          {'id': 'id', 'username': 'username', 'email': 'email',
+           'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+           'last_name': 'last_name'},
+          # Вход по коду подтверждения, пароль пользователям из датасета
+          # не нужен. В выгрузке export_dataset пароль есть
+          defaults={'password': make_password(None)}),
+    Table('review', 'review.csv', Review,
+          {'id': 'id', 'title_id': 'title_id', 'text': 'text',
+           'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date'}),
+    Table('comments', 'comments.csv', Comment,
+          {'id': 'id', 'review_id': 'review_id', 'text': 'text',
+           'author': 'author_id', 'pub_date': 'pub_date'}),
+]
+
+
+def get_table(name):
+    for table in TABLES:
+        if table.name == name:
+            return table
+    raise KeyError(name)
+
+
+def read_chunks(path, chunk_size, skip=0):
+    """
+    Читает CSV потоком, отдавая списки строк по chunk_size, первые skip
+    строк данных пропускаются
+    """
+    with open(path, newline='', encoding='utf-8') as csv_file:
+        reader = csv.DictReader(csv_file)
+        for _ in islice(reader, skip):
+            pass
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                return
+            yield rows
+
+
+def load_ids(model):
+    return set(model.objects.values_list('pk', flat=True).iterator())
+
+
+@contextmanager
+def keep_auto_now(model):
+    """
+    Отключает auto_now/auto_now_add на время импорта, иначе bulk_create
+    заменит даты из CSV на текущее время
+    """
+    fields = [field for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False)
+              or getattr(field, 'auto_now_add', False)]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def copy_insert(model, objects):
+    """Вставка строк одной командой COPY (PostgreSQL, psycopg2)"""
+    if not objects:
+        return
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objects:
+        writer.writerow([
+            field.get_db_prep_save(getattr(obj, field.attname), connection)
+            for field in fields
+        ])
+    buffer.seek(0)
+    quote_name = connection.ops.quote_name
+    sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        quote_name(model._meta.db_table),
+        ', '.join(quote_name(field.column) for field in fields),
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def clear_tables(tables):
+    """Удаляет данные таблиц, начиная с зависимых, одной транзакцией"""
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in reversed(tables):
+            cursor.execute('DELETE FROM {}'.format(
+                connection.ops.quote_name(table.model._meta.db_table)
+            ))
+
+
+def reset_sequences(tables):
+    """Сдвигает автоинкремент за импортированные явные id (PostgreSQL)"""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [table.model for table in tables]
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+class Checkpoint:
+    """
+    Прогресс импорта одной таблицы: число прочитанных строк CSV,
+    загруженных и пропущенных строк в зафиксированных пачках.
+    У каждой таблицы свой файл, поэтому параллельные воркеры не мешают
+    друг другу, а запись атомарна за счёт os.replace
+    """
+
+    def __init__(self, directory, table_name):
+        self.path = os.path.join(directory, f'{table_name}.json')
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as checkpoint_file:
+                return json.load(checkpoint_file)
+        except FileNotFoundError:
+            return {'read': 0, 'rows': 0, 'skipped': 0, 'duplicates': 0,
+                    'done': False}
+
+    def save(self, state):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(state, checkpoint_file)
+        os.replace(temporary, self.path)
+
+
+def clear_checkpoints(directory):
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class ImportResult:
+
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.rows = 0
+        self.skipped = 0
+        self.duplicates = 0
+        self.resumed_rows = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        message = (f'{self.table_name}: {self.rows} строк за '
+                   f'{self.elapsed:.2f} с ({self.rate:.0f} строк/с)')
+        if self.resumed_rows:
+            message += f', {self.resumed_rows} строк загружено ранее'
+        if self.skipped:
+            message += (f', пропущено {self.skipped} строк со ссылками '
+                        f'на несуществующие объекты')
+        if self.duplicates:
+            message += f', пропущено {self.duplicates} повторов'
+        return message
+
+
+def import_table(table, data_dir=DATA_DIR, chunk_size=5000, known_ids=None,
+                 checkpoint_dir=None, resume=False):
+    """
+    Загружает CSV таблицы пачками bulk_create, каждая пачка в своей
+    транзакции, после которой прогресс сохраняется в Checkpoint.
+    Внешние ключи проверяются по множествам id из known_ids (модель ->
+    set), недостающие множества загружаются из базы одним запросом.
+    При resume строки из пачек, зафиксированных до сбоя, пропускаются
+    """
+    known_ids = {} if known_ids is None else known_ids
+    for model in set(table.foreign_keys.values()):
+        if model not in known_ids:
+            known_ids[model] = load_ids(model)
+    checkpoint = Checkpoint(checkpoint_dir or CHECKPOINT_DIR, table.name)
+    state = checkpoint.load()
+    result = ImportResult(table.name)
+    result.resumed_rows = state['rows']
+    result.skipped = state['skipped']
+    result.duplicates = state['duplicates']
+    if state['done']:
+        return result
+    table.begin()
+    # Сбой мог произойти между фиксацией пачки и записью checkpoint,
+    # поэтому первая пачка после возобновления пропускает дубликаты
+    ignore_conflicts = resume
+    started = time.monotonic()
+    path = os.path.join(data_dir, table.filename)
+    with keep_auto_now(table.model):
+        for rows in read_chunks(path, chunk_size, skip=state['read']):
+            objects = []
+            for row in rows:
+                obj = table.to_object(row)
+                if any(getattr(obj, table.fields[column].attname)
+                       not in known_ids[model]
+                       for column, model in table.foreign_keys.items()):
+                    result.skipped += 1
+                    continue
+                if not table.accept(obj):
+                    result.duplicates += 1
+                    continue
+                objects.append(obj)
+            with transaction.atomic():
+                table.insert(objects, chunk_size, ignore_conflicts)
+            ignore_conflicts = False
+            result.rows += len(objects)
+            state.update(read=state['read'] + len(rows),
+                         skipped=result.skipped,
+                         duplicates=result.duplicates,
+                         rows=result.resumed_rows + result.rows)
+            checkpoint.save(state)
+    state['done'] = True
+    checkpoint.save(state)
+    result.elapsed = time.monotonic() - started
+    return result
+
+
+def format_value(value):
+    """Значение поля в том виде, в котором его читает import_table"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+    return value
+
+
+def export_table(table, output_dir, export_format='csv', chunk_size=5000):
+    """
+    Выгружает таблицу в файл с колонками как у CSV датасета, за которыми
+    следуют остальные поля модели (Table.extra_fields). Строки
+    читаются итератором пачками по chunk_size (в PostgreSQL - серверным
+    курсором), поэтому память не зависит от размера таблицы.
+    Возвращает количество выгруженных строк
+    """
+    columns = list(table.export_columns)
+    rows = table.model.objects.order_by('pk').values_list(
+        *table.export_columns.values()
+    ).iterator(chunk_size=chunk_size)
+    filename = table.filename
+    if export_format == 'ndjson':
+        filename = os.path.splitext(filename)[0] + '.ndjson'
+    count = 0
+    path = os.path.join(output_dir, filename)
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        if export_format == 'ndjson':
+            for row in rows:
+                output.write(json.dumps(
+                    dict(zip(columns, map(format_value, row))),
+                    ensure_ascii=False
+                ))
+                output.write('\n')
+                count += 1
+        else:
+            writer = csv.writer(output)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(['' if value is None else format_value(value)
+                                 for value in row])
+                count += 1
+    return count
+
+
+def _init_worker():
+    django.setup()
+
+
+def _import_in_worker(table_name, *args):
+    return import_table(get_table(table_name), *args)
+
+
+def import_tables(tables, data_dir=DATA_DIR, chunk_size=5000, workers=1,
+                  checkpoint_dir=None, resume=False):
+    """
+    Загружает таблицы по графу зависимостей: таблица запускается, когда
+    загружены все таблицы из выбранных, на которые она ссылается.
+    Независимые таблицы загружаются параллельно в workers процессах.
+    Без resume таблицы и checkpoint очищаются перед загрузкой.
+    Генератор отдаёт ImportResult по мере завершения таблиц
+    """
+    checkpoint_dir = checkpoint_dir or CHECKPOINT_DIR
+    if not resume:
+        clear_checkpoints(checkpoint_dir)
+        clear_tables(tables)
+    names = {table.name for table in tables}
+    dependencies = {table.name: table.dependencies & names
+                    for table in tables}
+    if workers <= 1:
+        known_ids = {}
+        for table in tables:
+            yield import_table(table, data_dir, chunk_size, known_ids,
+                               checkpoint_dir, resume)
+        return
+    # Процессы-воркеры открывают собственные соединения с базой,
+    # унаследованные при fork соединения закрываются заранее
+    connections.close_all()
+    args = (data_dir, chunk_size, None, checkpoint_dir, resume)
+    done, running = set(), {}
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_worker) as executor:
+        while len(done) < len(tables):
+            for name, required in dependencies.items():
+                if (name not in done and name not in running.values()
+                        and required <= done):
+                    future = executor.submit(_import_in_worker, name, *args)
+                    running[future] = name
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done.add(running.pop(future))
+                yield future.result()
@@ -0,0 +1,191 @@
+"""
+Генератор синтетического датасета заданного размера для нагрузочных
+замеров. Популярность произведений и отзывов распределена по закону Ципфа:
+немногие произведения собирают большую часть отзывов, немногие отзывы -
+большую часть комментариев. Генерация детерминирована при одинаковом seed
+"""
+import random
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+
+from api import suggest
+from api.cache import bump_versions
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+BATCH_SIZE = 10000
+
+ADJECTIVES = ('Тихий', 'Последний', 'Красный', 'Далёкий', 'Новый',
+              'Северный', 'Ночной', 'Большой', 'Тёмный', 'Летний')
+NOUNS = ('дом', 'берег', 'город', 'ветер', 'путь', 'сад', 'остров',
+         'поезд', 'мост', 'лес')
+WORDS = ('сюжет', 'герой', 'финал', 'музыка', 'автор', 'история',
+         'драма', 'поворот', 'образ', 'ритм', 'смысл', 'жанр')
+
+
+class DatasetSize:
+    """Размеры генерируемого датасета и параметры распределений"""
+
+    def __init__(self, users=1000, moderators=10, admins=2, titles=10000,
+                 genres=30, categories=5, reviews=100000, comments=100000,
+                 skew=1.1, seed=0):
+        self.users = users
+        self.moderators = moderators
+        self.admins = admins
+        self.titles = titles
+        self.genres = genres
+        self.categories = categories
+        self.reviews = reviews
+        self.comments = comments
+        self.skew = skew
+        self.seed = seed
+
+
+def zipf_counts(total, size, skew, limit=None, rng=None):
+    """
+    Раскладывает total объектов по size владельцам по закону Ципфа.
+    limit ограничивает количество объектов у одного владельца, излишек
+    достаётся остальным. Порядок владельцев перемешивается
+    """
+    weights = [1 / (rank + 1) ** skew for rank in range(size)]
+    counts = [0] * size
+    remaining, active = total, list(range(size))
+    while remaining > 0 and active:
+        scale = remaining / sum(weights[owner] for owner in active)
+        added, next_active = 0, []
+        for owner in active:
+            count = int(weights[owner] * scale + 0.5)
+            if limit is not None and counts[owner] + count >= limit:
+                count = limit - counts[owner]
+            else:
+                next_active.append(owner)
+            counts[owner] += count
+            added += count
+        if not added:
+            break
+        remaining -= added
+        active = next_active
+    if rng is not None:
+        rng.shuffle(counts)
+    return counts
+
+
+def bulk_create(model, objects):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, BATCH_SIZE))
+        if not batch:
+            break
+        model.objects.bulk_create(batch)
+
+
+def make_sentence(rng, words=8):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def last_id(model):
+    return model.objects.aggregate(value=Max('id'))['value'] or 0
+
+
+def ids_after(model, first):
+    return list(model.objects.filter(id__gt=first).order_by('id')
+                .values_list('id', flat=True))
+
+
+def generate(size, stdout=None):
+    """
+    Добавляет синтетические данные к уже существующим и возвращает
+    количество созданных объектов по таблицам
+    """
+    rng = random.Random(size.seed)
+    created = {}
+
+    def log(name, count):
+        created[name] = count
+        if stdout is not None:
+            stdout.write(f'{name}: {count}')
+
+    with transaction.atomic():
+        # Номера в именах и слагах начинаются после существующих id,
+        # поэтому повторный запуск не создаёт дубликатов
+        first = {model: last_id(model)
+                 for model in (User, Category, Genre, Title, Review)}
+        password = make_password(None)
+        roles = ([User.ADMINISTRATOR] * size.admins
+                 + [User.MODERATOR] * size.moderators
+                 + [User.AUTHENTICATED] * size.users)
+        bulk_create(User, (
+            User(username=f'gen{first[User] + number}', role=role,
+                 email=f'gen{first[User] + number}@yamdb.fake',
+                 password=password)
+            for number, role in enumerate(roles, 1)
+        ))
+        user_ids = ids_after(User, first[User])
+        log('users', len(user_ids))
+
+        bulk_create(Category, (
+            Category(name=f'Категория {first[Category] + number}',
+                     slug=f'gen-category-{first[Category] + number}')
+            for number in range(1, size.categories + 1)
+        ))
+        bulk_create(Genre, (
+            Genre(name=f'Жанр {first[Genre] + number}',
+                  slug=f'gen-genre-{first[Genre] + number}')
+            for number in range(1, size.genres + 1)
+        ))
+        category_ids = ids_after(Category, first[Category])
+        genre_ids = ids_after(Genre, first[Genre])
+        log('categories', len(category_ids))
+        log('genres', len(genre_ids))
+
+        category_weights = zipf_counts(100, len(category_ids), size.skew)
+        year = datetime.now().year
+        bulk_create(Title, (
+            Title(name=(f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} '
+                        f'{first[Title] + number}'),
+                  year=rng.randint(1900, year),
+                  description=make_sentence(rng),
+                  category_id=rng.choices(category_ids,
+                                          category_weights)[0])
+            for number in range(1, size.titles + 1)
+        ))
+        title_ids = ids_after(Title, first[Title])
+        log('titles', len(title_ids))
+
+        through = Title.genre.through
+        bulk_create(through, (
+            through(title_id=title_id, genre_id=genre_id)
+            for title_id in title_ids
+            for genre_id in rng.sample(genre_ids,
+                                       min(len(genre_ids), rng.randint(1, 3)))
+        ))
+
+        # У одного автора не больше одного отзыва на произведение
+        review_counts = zipf_counts(size.reviews, len(title_ids), size.skew,
+                                    limit=len(user_ids), rng=rng)
+        bulk_create(Review, (
+            Review(title_id=title_id, author_id=author_id,
+                   score=rng.randint(1, 10), text=make_sentence(rng))
+            for title_id, count in zip(title_ids, review_counts)
+            for author_id in rng.sample(user_ids, count)
+        ))
+        review_ids = ids_after(Review, first[Review])
+        log('reviews', len(review_ids))
+
+        comment_counts = zipf_counts(size.comments, len(review_ids),
+                                     size.skew, rng=rng)
+        bulk_create(Comment, (
+            Comment(review_id=review_id, author_id=rng.choice(user_ids),
+                    text=make_sentence(rng, 5))
+            for review_id, count in zip(review_ids, comment_counts)
+            for _ in range(count)
+        ))
+        log('comments', sum(comment_counts))
+
+        Title.objects.filter(id__gt=first[Title]).rebuild_ratings()
+    bump_versions('category', 'genre', 'title', 'review', 'comment', 'user',
+                  suggest.VERSION)
+    return created
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmark
+from reviews.generator import DatasetSize, generate
+
+
+class Command(BaseCommand):
+    help = ('Замеряет эндпоинты API внутри процесса: перцентили задержки, '
+            'SQL-запросы и память на запрос. Результаты можно сохранить '
+            'как базовую линию и сравнивать с ней следующие запуски')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'scenarios', nargs='*', metavar='scenario',
+            help='сценарии: ' + ', '.join(
+                scenario.name for scenario in benchmark.SCENARIOS
+            ) + '; по умолчанию все'
+        )
+        parser.add_argument('--requests', type=int, default=200,
+                            help='количество замеряемых запросов')
+        parser.add_argument('--warmup', type=int, default=20,
+                            help='количество запросов для прогрева')
+        parser.add_argument('--seed', action='store_true',
+                            help='перед замером добавить в базу датасет '
+                                 'generate_dataset с размерами по умолчанию')
+        parser.add_argument('--save', metavar='PATH',
+                            help='сохранить результаты как базовую линию')
+        parser.add_argument('--compare', metavar='PATH',
+                            help='сравнить результаты с базовой линией')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='допустимое ухудшение метрики при '
+                                 'сравнении, доля от базовой линии')
+
+    def handle(self, *args, **options):
+        try:
+            scenarios = benchmark.get_scenarios(options['scenarios'])
+            if options['seed']:
+                generate(DatasetSize(), self.stdout)
+            results = benchmark.run(scenarios, options['requests'],
+                                    options['warmup'])
+        except benchmark.BenchmarkError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            f'{"сценарий":<16}{"p50, мс":>10}{"p90, мс":>10}{"p99, мс":>10}'
+            f'{"запросов":>10}{"КиБ":>10}'
+        )
+        for name, metrics in results.items():
+            self.stdout.write(
+                f'{name:<16}{metrics["p50"]:>10.2f}{metrics["p90"]:>10.2f}'
+                f'{metrics["p99"]:>10.2f}{metrics["queries"]:>10.1f}'
+                f'{metrics["alloc_kib"]:>10.1f}'
+            )
+        if options['save']:
+            benchmark.save_baseline(options['save'], results)
+            self.stdout.write(f'Базовая линия сохранена в {options["save"]}')
+        if options['compare']:
+            self.compare(results, options['compare'], options['tolerance'])
+
+    def compare(self, results, path, tolerance):
+        rows = benchmark.compare(results, benchmark.load_baseline(path),
+                                 tolerance)
+        regressions = 0
+        for name, metric, old, new, change, regressed in rows:
+            line = (f'{name:<16}{metric:<10}{old:>10.2f} -> {new:<10.2f}'
+                    f'{change:+.1%}')
+            if regressed:
+                regressions += 1
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                f'Метрик хуже базовой линии более чем на {tolerance:.0%}: '
+                f'{regressions}'
+            )
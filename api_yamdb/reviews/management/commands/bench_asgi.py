@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmark
+from reviews.generator import DatasetSize, generate
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает WSGI-обработчик и ASGI-приложение под нагрузкой из '
+            'нескольких одновременных клиентов: пропускная способность и '
+            'перцентили задержки чтения каталога, отзывов и комментариев')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+',
+                            default=[1, 8, 32],
+                            help='числа одновременных клиентов')
+        parser.add_argument('--requests', type=int, default=400,
+                            help='количество запросов на каждый замер')
+        parser.add_argument('--write-share', type=float, default=0.1,
+                            help='доля запросов на изменение произведения')
+        parser.add_argument('--seed', action='store_true',
+                            help='перед замером добавить в базу датасет '
+                                 'generate_dataset с размерами по умолчанию')
+
+    def handle(self, *args, **options):
+        try:
+            if options['seed']:
+                generate(DatasetSize(), self.stdout)
+            rows = benchmark.run_concurrent(options['concurrency'],
+                                            options['requests'],
+                                            options['write_share'])
+        except benchmark.BenchmarkError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            f'{"режим":<8}{"клиентов":>10}{"запр./с":>10}'
+            f'{"чтение p50":>12}{"чтение p99":>12}{"запись p99":>12}'
+        )
+        for row in rows:
+            write_p99 = row['write_p99']
+            write_p99 = '-' if write_p99 is None else f'{write_p99:.2f}'
+            self.stdout.write(
+                f'{row["mode"]:<8}{row["concurrency"]:>10}'
+                f'{row["rps"]:>10.1f}{row["read_p50"]:>12.2f}'
+                f'{row["read_p99"]:>12.2f}{write_p99:>12}'
+            )
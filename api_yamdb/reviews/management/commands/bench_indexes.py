@@ -0,0 +1,194 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.db.models import Max, Min
+
+from reviews.generator import DatasetSize, generate
+from reviews.models import Comment, Review, Title, User
+
+# Индексы, удалённые миграцией 0004_query_indexes: проверяется, сколько
+# они стоили при записи комментариев
+REMOVED_INDEXES = (
+    models.Index(fields=['text'], name='bench_comment_text'),
+    models.Index(fields=['author'], name='bench_comment_author'),
+)
+
+
+def get_index(model, name):
+    for index in model._meta.indexes + model._meta.constraints:
+        if index.name == name:
+            return index
+    raise CommandError(f'У модели {model.__name__} нет индекса {name}')
+
+
+def get_fields_index(model, fields):
+    for index in model._meta.indexes:
+        if index.fields == fields:
+            return index
+    raise CommandError(
+        f'У модели {model.__name__} нет индекса по полям {fields}'
+    )
+
+
+def run_sql(statement):
+    with connection.cursor() as cursor:
+        cursor.execute(str(statement))
+
+
+def can_drop(index):
+    # В SQLite ограничение уникальности входит в CREATE TABLE, и его
+    # индекс нельзя удалить без пересоздания таблицы
+    return connection.vendor != 'sqlite' or isinstance(index, models.Index)
+
+
+@contextmanager
+def without_index(model, index):
+    """Временно удаляет индекс; изменения схемы откатываются"""
+    editor = connection.schema_editor()
+    with transaction.atomic():
+        run_sql(index.remove_sql(model, editor))
+        yield
+        transaction.set_rollback(True)
+
+
+@contextmanager
+def with_indexes(model, indexes):
+    """Временно создаёт индексы; изменения схемы откатываются"""
+    editor = connection.schema_editor()
+    with transaction.atomic():
+        for index in indexes:
+            run_sql(index.create_sql(model, editor))
+        yield
+        transaction.set_rollback(True)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время запросов API с индексами и без них, а также '
+            'стоимость записи комментариев с удалёнными индексами. '
+            'Схема меняется только внутри откатываемых транзакций')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true',
+                            help='перед замером заполнить базу '
+                                 'синтетическими данными')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=1000000)
+        parser.add_argument('--comments', type=int, default=1000000)
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='количество выполнений каждого запроса')
+        parser.add_argument('--write-rows', type=int, default=20000,
+                            help='количество комментариев в замере записи')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if options['seed']:
+            self.seed(options)
+        if not Review.objects.exists():
+            raise CommandError('В базе нет отзывов, запустите с --seed')
+        self.rng = random.Random(0)
+        self.ranges = {
+            model: model.objects.aggregate(low=Min('id'), high=Max('id'))
+            for model in (User, Title, Review)
+        }
+        self.stdout.write(
+            f'{"запрос":<28}{"индекс":>32}{"с ним, мс":>12}'
+            f'{"без него, мс":>14}'
+        )
+        for label, model, index, query in self.get_cases():
+            self.bench_query(label, model, index, query, options)
+        self.bench_writes(options)
+
+    def random_id(self, model):
+        bounds = self.ranges[model]
+        return self.rng.randint(bounds['low'], bounds['high'])
+
+    def get_cases(self):
+        """Запросы API и индексы, которые их обслуживают"""
+        return (
+            ('список отзывов', Review,
+             get_fields_index(Review, ['title', '-id']),
+             lambda: Review.objects.filter(
+                 title_id=self.random_id(Title)
+             ).order_by('-id')[:10]),
+            ('список комментариев', Comment,
+             get_fields_index(Comment, ['review', '-id']),
+             lambda: Comment.objects.filter(
+                 review_id=self.random_id(Review)
+             ).order_by('-id')[:10]),
+            ('повторный отзыв', Review,
+             get_index(Review, 'unique_review'),
+             lambda: Review.objects.filter(
+                 author_id=self.random_id(User),
+                 title_id=self.random_id(Title),
+             ).values('id')[:1]),
+            ('фильтр по году', Title,
+             get_fields_index(Title, ['year']),
+             lambda: Title.objects.filter(
+                 year=self.rng.randint(1900, datetime.now().year)
+             ).order_by('-id')[:10]),
+        )
+
+    def measure(self, query, repeat):
+        timings = []
+        for _ in range(repeat):
+            queryset = query()
+            start = time.perf_counter()
+            list(queryset)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    def bench_query(self, label, model, index, query, options):
+        with_time = self.measure(query, options['repeat'])
+        if self.verbosity > 1:
+            self.stdout.write(query().explain())
+        without_time = '-'
+        if can_drop(index):
+            with without_index(model, index):
+                without_time = '{:.3f}'.format(
+                    self.measure(query, options['repeat'])
+                )
+        self.stdout.write(
+            f'{label:<28}{index.name:>32}{with_time:>12.3f}'
+            f'{without_time:>14}'
+        )
+
+    def insert_comments(self, count):
+        objects = [
+            Comment(text=f'Комментарий {number}',
+                    author_id=self.random_id(User),
+                    review_id=self.random_id(Review))
+            for number in range(count)
+        ]
+        start = time.perf_counter()
+        with transaction.atomic():
+            Comment.objects.bulk_create(objects)
+            transaction.set_rollback(True)
+        return count / (time.perf_counter() - start)
+
+    def bench_writes(self, options):
+        count = options['write_rows']
+        current = self.insert_comments(count)
+        with with_indexes(Comment, REMOVED_INDEXES):
+            removed = self.insert_comments(count)
+        self.stdout.write(
+            f'запись комментариев: {current:.0f} строк/с, с удалёнными '
+            f'индексами text и author: {removed:.0f} строк/с'
+        )
+
+    def seed(self, options):
+        if options['reviews'] > options['users'] * options['titles']:
+            raise CommandError('Отзывов больше, чем пар (автор, произведение)')
+        start = time.perf_counter()
+        generate(DatasetSize(
+            users=options['users'], titles=options['titles'],
+            reviews=options['reviews'], comments=options['comments'],
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'База заполнена за {time.perf_counter() - start:.1f} с'
+        ))
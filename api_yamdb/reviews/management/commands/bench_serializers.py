@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import benchmark
+from reviews.generator import DatasetSize, generate
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает стоимость одного объекта в ModelSerializer и в '
+            'сериализаторах на values() для произведений, отзывов и '
+            'комментариев, включая запросы к базе')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=500,
+                            help='количество объектов в замере')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='количество повторов, берётся лучшее время')
+        parser.add_argument('--seed', action='store_true',
+                            help='перед замером добавить в базу датасет '
+                                 'generate_dataset с размерами по умолчанию')
+
+    def handle(self, *args, **options):
+        try:
+            if options['seed']:
+                generate(DatasetSize(), self.stdout)
+            results = benchmark.measure_serializers(options['count'],
+                                                    options['repeat'])
+        except benchmark.BenchmarkError as error:
+            raise CommandError(error)
+        self.stdout.write(
+            f'{"модель":<10}{"объектов":>10}{"model, мкс":>12}'
+            f'{"values, мкс":>13}{"ускорение":>11}'
+        )
+        for name, metrics in results.items():
+            self.stdout.write(
+                f'{name:<10}{metrics["objects"]:>10}'
+                f'{metrics["model_us"]:>12.1f}{metrics["values_us"]:>13.1f}'
+                f'{metrics["speedup"]:>10.1f}x'
+            )
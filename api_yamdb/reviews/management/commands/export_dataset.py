@@ -0,0 +1,45 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.dataset import export_table, get_table, TABLES
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает все поля моделей в CSV или NDJSON: '
+            'колонки датасета, которые ожидает import_csv, и за ними '
+            'остальные поля. Связи пользователей с группами и правами '
+            'Django не выгружаются')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables', nargs='*', metavar='table',
+            help='таблицы для выгрузки: ' + ', '.join(
+                table.name for table in TABLES
+            ) + '; по умолчанию все'
+        )
+        parser.add_argument('--output-dir', required=True,
+                            help='каталог для файлов выгрузки')
+        parser.add_argument('--format', choices=('csv', 'ndjson'),
+                            default='csv', dest='export_format',
+                            help='формат файлов')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='количество строк, читаемых за раз')
+
+    def handle(self, *args, **options):
+        try:
+            tables = [get_table(name) for name in options['tables']]
+        except KeyError as error:
+            raise CommandError(f'Неизвестная таблица {error}')
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for table in tables or TABLES:
+            started = time.monotonic()
+            rows = export_table(table, options['output_dir'],
+                                options['export_format'],
+                                options['chunk_size'])
+            elapsed = time.monotonic() - started
+            rate = rows / elapsed if elapsed else 0.0
+            self.stdout.write(f'{table.name}: {rows} строк за '
+                              f'{elapsed:.2f} с ({rate:.0f} строк/с)')
+        self.stdout.write(self.style.SUCCESS('Датасет успешно выгружен'))
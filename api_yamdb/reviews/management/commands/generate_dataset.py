@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.generator import DatasetSize, generate
+
+
+class Command(BaseCommand):
+    help = ('Добавляет в базу синтетический датасет заданного размера: '
+            'пользователей по ролям, жанры, категории, произведения, '
+            'отзывы и комментарии с распределением популярности по '
+            'закону Ципфа')
+
+    def add_arguments(self, parser):
+        defaults = DatasetSize()
+        for name in ('users', 'moderators', 'admins', 'titles', 'genres',
+                     'categories', 'reviews', 'comments', 'seed'):
+            parser.add_argument(f'--{name}', type=int,
+                                default=getattr(defaults, name))
+        parser.add_argument('--skew', type=float, default=defaults.skew,
+                            help='показатель закона Ципфа; 0 - равномерное '
+                                 'распределение')
+
+    def handle(self, *args, **options):
+        size = DatasetSize(**{
+            name: options[name] for name in vars(DatasetSize())
+        })
+        start = time.perf_counter()
+        generate(size, self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Датасет создан за {time.perf_counter() - start:.1f} с'
+        ))
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import suggest
+from api.authentication import USERS_VERSION
+from api.cache import bump_versions
+from reviews.dataset import (CHECKPOINT_DIR, clear_checkpoints, DATA_DIR,
+                             get_table, import_tables, reset_sequences,
+                             TABLES)
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = ('Загружает датасет из CSV (static/data) потоково, пачками '
+            'bulk_create. Независимые таблицы загружаются параллельно, '
+            'прогресс сохраняется после каждой пачки, и после сбоя '
+            'загрузку можно продолжить с --resume')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'tables', nargs='*', metavar='table',
+            help='таблицы для загрузки: ' + ', '.join(
+                table.name for table in TABLES
+            ) + '; по умолчанию все'
+        )
+        parser.add_argument('--data-dir', default=DATA_DIR,
+                            help='каталог с CSV-файлами')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='количество строк в одной пачке')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='количество процессов для независимых '
+                                 'таблиц; 1 - загрузка в текущем процессе')
+        parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR,
+                            help='каталог для сохранения прогресса')
+        parser.add_argument('--resume', action='store_true',
+                            help='продолжить прерванную загрузку без '
+                                 'удаления уже загруженных данных')
+
+    def get_tables(self, names):
+        if not names:
+            return TABLES
+        try:
+            selected = {get_table(name).name for name in names}
+        except KeyError as error:
+            raise CommandError(f'Неизвестная таблица {error}')
+        return [table for table in TABLES if table.name in selected]
+
+    def handle(self, *args, **options):
+        tables = self.get_tables(options['tables'])
+        results = import_tables(
+            tables, options['data_dir'], options['chunk_size'],
+            options['workers'], options['checkpoint_dir'], options['resume']
+        )
+        try:
+            for result in results:
+                self.stdout.write(str(result))
+        except Exception as error:
+            raise CommandError(
+                f'Загрузка прервана: {error!r}. Загруженные пачки '
+                f'сохранены, продолжить можно с --resume'
+            ) from error
+        finally:
+            # bulk_create не вызывает Review.save и сигналы, поэтому рейтинг,
+            # версии кеша ответов и кеш пользователей из токенов обновляются
+            # явно, в том числе после сбоя: пачки, загруженные до него, уже
+            # в базе
+            Title.objects.rebuild_ratings()
+            bump_versions('category', 'genre', 'title', 'review', 'comment',
+                          'user', suggest.VERSION, USERS_VERSION)
+        clear_checkpoints(options['checkpoint_dir'])
+        reset_sequences(tables)
+        self.stdout.write(self.style.SUCCESS('Датасет успешно импортирован'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сумму и количество оценок произведений по '
+            'таблице отзывов (исправление рассинхронизации рейтинга)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('title_ids', nargs='*', type=int,
+                            help='id произведений; по умолчанию все')
+
+    def handle(self, *args, **options):
+        titles = Title.objects.all()
+        if options['title_ids']:
+            titles = titles.filter(pk__in=options['title_ids'])
+        updated = titles.rebuild_ratings()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для произведений: {updated}'
+        ))
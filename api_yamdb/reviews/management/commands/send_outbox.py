@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from reviews import outbox
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из очереди outbox пачками через одно '
+            'SMTP-соединение. Используется при EMAIL_OUTBOX_MODE=command')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='отправить готовые письма и завершиться')
+        parser.add_argument('--interval', type=float, default=5,
+                            help='пауза между проверками очереди, секунды')
+        parser.add_argument('--batch-size', type=int,
+                            help='количество писем в одной пачке')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            sent = outbox.deliver_pending(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Отправлено писем: {sent}'
+            ))
+            return
+        outbox.run_forever(options['interval'], options['batch_size'])
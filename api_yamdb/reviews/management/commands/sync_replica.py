@@ -0,0 +1,44 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from api.routers import get_replicas
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик из DB_REPLICAS. '
+            'Заменяет репликацию при локальной проверке чтения с реплик')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help='повторять копирование каждые N секунд, '
+                                 'имитируя отставание реплики')
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != 'sqlite':
+            raise CommandError('Копирование поддерживается только для '
+                               'SQLite, реплики других СУБД обновляет '
+                               'сервер базы')
+        replicas = get_replicas()
+        if not replicas:
+            raise CommandError('Реплики не настроены, задайте DB_REPLICAS')
+        while True:
+            for alias in replicas:
+                self.copy(source, alias)
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def copy(self, source, alias):
+        replica = connections[alias]
+        replica.close()
+        source.ensure_connection()
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(f'{alias}: {replica.settings_dict["NAME"]}')
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+from reviews import search_index
+
+SQLITE_FORWARD = [
+    search_index.CREATE_TABLE,
+    *search_index.TRIGGERS.values(),
+    search_index.REBUILD,
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS reviews_title_fts_au',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_ad',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_ai',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+]
+
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX reviews_title_search_idx ON reviews_title USING GIN (
+        to_tsvector('simple', coalesce(name, '') || ' ' ||
+                              coalesce(description, ''))
+    )
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS reviews_title_search_idx',
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating_aggregate'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD,
+                            'postgresql': POSTGRESQL_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_BACKWARD,
+                            'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.19 on 2026-10-18 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=150, primary_key=True, serialize=False, verbose_name='Имя')),
+                ('version', models.BigIntegerField(verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия кеша',
+                'verbose_name_plural': 'Версии кеша',
+            },
+        ),
+    ]
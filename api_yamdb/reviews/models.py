@@ -2,7 +2,10 @@ from datetime import datetime
 
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -43,7 +46,20 @@ class User(AbstractUser):
         return self.role == User.MODERATOR
 
 
-class Category(models.Model):
+class LoadedNameMixin:
+    """
+    Запоминает загруженное из БД название, чтобы индекс подсказок
+    (api/suggest.py) обновлялся только при его изменении
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_name = instance.__dict__.get('name')
+        return instance
+
+
+class Category(LoadedNameMixin, models.Model):
     """Модель категорий (типы) произведений («Фильмы», «Книги», «Музыка»)"""
 
     name = models.CharField(max_length=256, verbose_name='Имя категории')
@@ -62,7 +78,7 @@ class Category(models.Model):
         return self.name
 
 
-class Genre(models.Model):
+class Genre(LoadedNameMixin, models.Model):
     """Модель жанра произведения"""
 
     name = models.CharField(max_length=256, verbose_name='Имя жанра')
@@ -81,7 +97,36 @@ class Genre(models.Model):
         ]
 
 
-class Title(models.Model):
+class TitleQuerySet(models.QuerySet):
+    """QuerySet произведений с операциями над агрегатами рейтинга"""
+
+    def add_rating(self, score, count=1):
+        """
+        Сдвигает сумму и количество оценок на указанные величины. Агрегаты
+        не опускаются ниже нуля: если они разошлись с отзывами (например,
+        после bulk_create), удаление отзыва не нарушит CHECK >= 0
+        """
+        return self.update(
+            rating_sum=Greatest(F('rating_sum') + score, 0),
+            rating_count=Greatest(F('rating_count') + count, 0),
+        )
+
+    def rebuild_ratings(self):
+        """Пересчитывает агрегаты рейтинга по таблице отзывов"""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score'))
+                         .values('total')), 0),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('id'))
+                         .values('total')), 0),
+        )
+
+
+class Title(LoadedNameMixin, models.Model):
     """
     Модель произведения, к которым пишут отзывы (определённый фильм, книга
     или песенка)
@@ -103,14 +148,32 @@ class Title(models.Model):
                                  on_delete=models.SET_NULL,
                                  null=True,
                                  verbose_name='Категория произведения')
+    rating_sum = models.PositiveIntegerField(verbose_name='Сумма оценок',
+                                             default=0, editable=False)
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок', default=0, editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    @property
+    def rating(self):
+        """Средняя оценка произведения, None если отзывов нет"""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
     class Meta:
         ordering = ('-id',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            # Фильтр year в TitleFilter
+            models.Index(fields=['year', ]),
+        ]
 
 
 class Review(models.Model):
@@ -119,11 +182,14 @@ class Review(models.Model):
     text = models.TextField(verbose_name='текст отзыва')
     pub_date = models.DateTimeField(verbose_name='Дата публикации',
                                     auto_now_add=True)
+    # Отдельные индексы внешних ключей не нужны: author покрыт индексом
+    # unique_review, title - составным индексом (title, -id)
     author = models.ForeignKey(User, verbose_name='Автор публикации',
                                related_name='reviews',
-                               on_delete=models.CASCADE)
+                               on_delete=models.CASCADE, db_index=False)
     title = models.ForeignKey(Title, on_delete=models.CASCADE,
                               related_name='reviews', null=True,
+                              db_index=False,
                               verbose_name='Наименование произведения')
     score = models.PositiveSmallIntegerField(
         verbose_name='Оценка произведения',
@@ -136,10 +202,53 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженные из БД произведение и оценку, чтобы при
+        # сохранении сдвинуть агрегаты рейтинга на разницу, а не
+        # пересчитывать их целиком
+        instance._loaded_rating = (instance.__dict__.get('title_id'),
+                                   instance.__dict__.get('score'))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # С явно заданным pk save() может обновить существующую строку,
+        # поэтому вставку считаем гарантированной только без pk
+        adding = self._state.adding and self.pk is None
+        loaded = (None if self._state.adding
+                  else getattr(self, '_loaded_rating', None))
+        update_fields = kwargs.get('update_fields')
+        rating_changed = update_fields is None or bool(
+            {'score', 'title', 'title_id'} & set(update_fields)
+        )
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            titles = Title.objects.using(self._state.db)
+            if adding:
+                titles.filter(pk=self.title_id).add_rating(self.score)
+            elif not rating_changed:
+                pass
+            elif loaded is None or None in loaded:
+                stale = {self.title_id, loaded[0] if loaded else None}
+                titles.filter(pk__in=stale).rebuild_ratings()
+            elif loaded[0] != self.title_id:
+                titles.filter(pk=loaded[0]).add_rating(-loaded[1], -1)
+                titles.filter(pk=self.title_id).add_rating(self.score)
+            elif loaded[1] != self.score:
+                titles.filter(pk=self.title_id).add_rating(
+                    self.score - loaded[1], 0
+                )
+        self._loaded_rating = (self.title_id, self.score)
+
     class Meta:
         ordering = ('-id',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            # Отзывы к произведению в порядке выдачи API
+            models.Index(fields=['title', '-id']),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -154,8 +263,10 @@ class Comment(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                related_name='comments',
                                verbose_name='автор комментария')
+    # Индекс внешнего ключа покрыт составным индексом (review, -id)
     review = models.ForeignKey(Review, on_delete=models.CASCADE,
-                               related_name='comments', verbose_name='отзыв')
+                               related_name='comments', db_index=False,
+                               verbose_name='отзыв')
     text = models.TextField(verbose_name='текст комментария')
     pub_date = models.DateTimeField(verbose_name='дата публикации',
                                     auto_now_add=True)
@@ -168,6 +279,69 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         indexes = [
-            models.Index(fields=['text', ]),
-            models.Index(fields=['author', ]),
+            # Комментарии к отзыву в порядке выдачи API
+            models.Index(fields=['review', '-id']),
         ]
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (outbox)"""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    ]
+
+    subject = models.CharField(verbose_name='Тема', max_length=255)
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(verbose_name='Отправитель',
+                                  max_length=254)
+    # Адреса получателей по одному на строку
+    recipients = models.TextField(verbose_name='Получатели')
+    status = models.CharField(verbose_name='Статус', max_length=10,
+                              choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки', default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка', default=timezone.now
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка',
+                                  blank=True)
+    created_at = models.DateTimeField(verbose_name='Создано',
+                                      auto_now_add=True)
+    sent_at = models.DateTimeField(verbose_name='Отправлено', null=True,
+                                   blank=True)
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipients}'
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            # Выборка писем, готовых к отправке
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+
+class CacheVersion(models.Model):
+    """
+    Версия модели или объекта для ETag и кеша ответов (api/cache.py).
+    Версии хранятся в базе, когда кеш не общий для воркеров
+    """
+    name = models.CharField(verbose_name='Имя', max_length=150,
+                            primary_key=True)
+    version = models.BigIntegerField(verbose_name='Версия')
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
+
+    class Meta:
+        verbose_name = 'Версия кеша'
+        verbose_name_plural = 'Версии кеша'
@@ -0,0 +1,205 @@
+"""
+Очередь исходящих писем (outbox). Письмо сохраняется в таблицу в той же
+транзакции, что и данные запроса, а отправляется позже пачками через одно
+SMTP-соединение. Неудачные попытки повторяются с экспоненциальной
+задержкой, после MAX_ATTEMPTS письмо помечается как неотправленное.
+
+Режимы EMAIL_OUTBOX['MODE']:
+    thread  - фоновый поток процесса отправляет письма после коммита;
+    command - письма отправляет отдельный процесс send_outbox;
+    eager   - письмо отправляется сразу после коммита (тесты)
+"""
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, connections, transaction
+from django.utils import timezone
+
+from api import metrics
+from reviews.models import OutgoingEmail
+
+# На это время письмо закрепляется за отправителем. Перед отправкой каждого
+# письма аренда продлевается, поэтому она должна покрывать отправку одного
+# письма, а не всей пачки. Если процесс упал во время отправки, письмо
+# снова станет доступным по истечении аренды
+LEASE = timedelta(minutes=5)
+
+_worker = None
+_worker_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def get_option(name):
+    return settings.EMAIL_OUTBOX[name]
+
+
+def enqueue(subject, body, from_email, recipients):
+    """Ставит письмо в очередь; отправка начнётся после коммита"""
+    email = OutgoingEmail.objects.create(
+        subject=subject, body=body, from_email=from_email,
+        recipients='\n'.join(recipients),
+    )
+    mode = get_option('MODE')
+    if mode == 'eager':
+        transaction.on_commit(deliver_pending)
+    elif mode == 'thread':
+        transaction.on_commit(start_worker)
+    return email
+
+
+def get_backoff(attempts):
+    delay = min(get_option('BACKOFF') * 2 ** (attempts - 1),
+                get_option('BACKOFF_MAX'))
+    return timedelta(seconds=delay * random.uniform(1, 1.1))
+
+
+def claim(batch_size):
+    """Закрепляет за текущим отправителем пачку готовых писем"""
+    now = timezone.now()
+    candidates = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING, next_attempt_at__lte=now
+    ).values_list('id', 'next_attempt_at')[:batch_size]
+    claimed = []
+    for email_id, next_attempt_at in candidates:
+        # Условие на старое значение защищает от двойной отправки
+        # конкурирующими процессами
+        updated = OutgoingEmail.objects.filter(
+            id=email_id, status=OutgoingEmail.PENDING,
+            next_attempt_at=next_attempt_at,
+        ).update(next_attempt_at=now + LEASE)
+        if updated:
+            claimed.append(email_id)
+    return list(OutgoingEmail.objects.filter(id__in=claimed))
+
+
+def renew(email):
+    """
+    Продлевает аренду письма перед отправкой. False - аренда истекла, и
+    письмо уже забрал другой отправитель
+    """
+    lease = timezone.now() + LEASE
+    updated = OutgoingEmail.objects.filter(
+        id=email.id, status=OutgoingEmail.PENDING,
+        next_attempt_at=email.next_attempt_at,
+    ).update(next_attempt_at=lease)
+    if updated:
+        email.next_attempt_at = lease
+    return bool(updated)
+
+
+def mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = repr(error)
+    if email.attempts >= get_option('MAX_ATTEMPTS'):
+        email.status = OutgoingEmail.FAILED
+    else:
+        email.next_attempt_at = timezone.now() + get_backoff(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'status',
+                              'next_attempt_at'])
+    metrics.inc('yamdb_email_send_failures_total', kind='outbox')
+
+
+def send_batch(emails):
+    """
+    Отправляет письма через одно соединение, возвращает число успешных.
+    Каждое письмо отмечается отправленным сразу после отправки
+    """
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            mark_failed(email, error)
+        return 0
+    sent = 0
+    try:
+        for email in emails:
+            if not renew(email):
+                continue
+            message = EmailMessage(
+                email.subject, email.body, email.from_email,
+                email.recipients.split('\n'), connection=connection,
+            )
+            try:
+                with metrics.timer('yamdb_email_send_seconds',
+                                   kind='outbox'):
+                    message.send()
+            except Exception as error:
+                mark_failed(email, error)
+                continue
+            email.status = OutgoingEmail.SENT
+            email.attempts += 1
+            email.sent_at = timezone.now()
+            email.save(update_fields=['status', 'attempts', 'sent_at'])
+            sent += 1
+    finally:
+        connection.close()
+    return sent
+
+
+def deliver_pending(batch_size=None):
+    """Отправляет все готовые письма пачками, возвращает число успешных"""
+    batch_size = batch_size or get_option('BATCH_SIZE')
+    sent = 0
+    while True:
+        emails = claim(batch_size)
+        if not emails:
+            return sent
+        sent += send_batch(emails)
+
+
+def next_attempt_delay():
+    """Секунды до ближайшей повторной попытки, None если очередь пуста"""
+    next_attempt_at = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING
+    ).order_by('next_attempt_at').values_list(
+        'next_attempt_at', flat=True
+    ).first()
+    if next_attempt_at is None:
+        return None
+    return max(0.0, (next_attempt_at - timezone.now()).total_seconds())
+
+
+def run_worker():
+    """Фоновый поток: отправляет письма, пока в очереди есть ожидающие"""
+    global _worker
+    try:
+        while True:
+            _wakeup.clear()
+            deliver_pending()
+            delay = next_attempt_delay()
+            with _worker_lock:
+                # Письмо могло появиться после проверки очереди
+                if delay is None and not _wakeup.is_set():
+                    _worker = None
+                    return
+            if delay is not None:
+                _wakeup.wait(delay)
+    finally:
+        with _worker_lock:
+            if _worker is threading.current_thread():
+                _worker = None
+        connections.close_all()
+
+
+def start_worker():
+    global _worker
+    with _worker_lock:
+        _wakeup.set()
+        if _worker is None:
+            _worker = threading.Thread(target=run_worker, name='outbox',
+                                       daemon=True)
+            _worker.start()
+
+
+def run_forever(interval, batch_size=None):
+    """Цикл отдельного процесса-отправителя (команда send_outbox)"""
+    while True:
+        close_old_connections()
+        deliver_pending(batch_size)
+        delay = next_attempt_delay()
+        time.sleep(interval if delay is None else min(delay, interval))
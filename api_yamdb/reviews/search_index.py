@@ -0,0 +1,66 @@
+"""
+Таблица FTS5 reviews_title_fts и триггеры SQLite, которые её обновляют.
+SQLite не умеет изменять столбцы, поэтому при AlterField и RemoveField
+Django пересоздаёт reviews_title, и триггеры молча удаляются вместе со
+старой таблицей. Поэтому после каждой миграции недостающие триггеры
+создаются заново (reviews.signals.restore_search_triggers)
+"""
+TABLE = 'reviews_title_fts'
+
+CREATE_TABLE = f"""
+    CREATE VIRTUAL TABLE {TABLE} USING fts5(
+        name, description,
+        content='reviews_title', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+TRIGGERS = {
+    'reviews_title_fts_ai': f"""
+    CREATE TRIGGER reviews_title_fts_ai AFTER INSERT ON reviews_title BEGIN
+        INSERT INTO {TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    'reviews_title_fts_ad': f"""
+    CREATE TRIGGER reviews_title_fts_ad AFTER DELETE ON reviews_title BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    'reviews_title_fts_au': f"""
+    CREATE TRIGGER reviews_title_fts_au
+    AFTER UPDATE OF name, description ON reviews_title BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+}
+
+REBUILD = f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')"
+
+
+def restore_sqlite_triggers(connection):
+    """
+    Создаёт недостающие триггеры и перестраивает индекс, который мог
+    устареть, пока их не было. Возвращает имена созданных триггеров
+    """
+    names = [TABLE, *TRIGGERS]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT name FROM sqlite_master WHERE name IN (%s)'
+            % ', '.join(['%s'] * len(names)),
+            names,
+        )
+        existing = {name for name, in cursor.fetchall()}
+        if TABLE not in existing:
+            # Миграция 0003 ещё не применена
+            return []
+        missing = [name for name in TRIGGERS if name not in existing]
+        for name in missing:
+            cursor.execute(TRIGGERS[name])
+        if missing:
+            cursor.execute(REBUILD)
+    return missing
@@ -0,0 +1,28 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate
+from django.dispatch import receiver
+
+from reviews import search_index
+from reviews.models import Review, Title
+
+
+@receiver(post_delete, sender=Review)
+def subtract_rating(sender, instance, using, **kwargs):
+    # Сигнал приходит и при каскадном удалении (вместе с автором или
+    # произведением), и при delete() у QuerySet, в той же транзакции
+    title_id, score = getattr(instance, '_loaded_rating',
+                              (instance.title_id, instance.score))
+    titles = Title.objects.using(using)
+    if score is None:
+        titles.filter(pk=title_id).rebuild_ratings()
+    else:
+        titles.filter(pk=title_id).add_rating(-score, -1)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    # Миграции, пересоздающие reviews_title в SQLite, удаляют триггеры
+    # поискового индекса (см. reviews.search_index)
+    connection = connections[using]
+    if sender.label == 'reviews' and connection.vendor == 'sqlite':
+        search_index.restore_sqlite_triggers(connection)
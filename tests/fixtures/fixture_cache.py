@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_caches(settings):
+    from django.core.cache import caches
+
+    # База очищается между тестами, а id объектов повторяются, поэтому
+    # закешированные ответы предыдущего теста нужно сбросить
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+
+@pytest.fixture(autouse=True)
+def response_cache(settings):
+    # Тесты выполняются в одном процессе, поэтому кеш в памяти процесса
+    # для них общий
+    settings.API_RESPONSE_CACHE = dict(settings.API_RESPONSE_CACHE,
+                                       ALIAS='default', SHARED=True)
+
+
+@pytest.fixture(autouse=True)
+def reset_throttling():
+    from api.throttling import memory_store
+
+    # Все тестовые запросы идут с одного IP, лимиты считаются заново
+    # в каждом тесте
+    memory_store.reset()
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_outbox(settings):
+    # Тесты проверяют mail.outbox сразу после запроса, поэтому письма
+    # отправляются после коммита в том же потоке
+    settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MODE='eager')
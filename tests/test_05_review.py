@@ -334,3 +334,41 @@ class Test05ReviewAPI:
             'без токена авторизации возвращается статус 401'
         )
         self.check_permissions(user, 'обычного пользователя', reviews, titles)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_rating_after_cascade_delete(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (9, 2), (
+            'Проверьте, что при удалении пользователя его отзывы '
+            'вычитаются из рейтинга произведения'
+        )
+        Review.objects.filter(author=moderator).delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (5, 1), (
+            'Проверьте, что delete() у QuerySet отзывов обновляет рейтинг '
+            'произведения'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['rating'] == 5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_delete_review_with_stale_rating(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        # bulk_create не обновляет агрегаты рейтинга, как при сбое импорта
+        Review.objects.bulk_create([Review(
+            title_id=titles[0]['id'], author=admin, text='Отзыв', score=7
+        )])
+        response = admin_client.delete(f'/api/v1/users/{admin.username}/')
+        assert response.status_code == 204, (
+            'Проверьте, что отзыв удаляется, даже если рейтинг произведения '
+            'разошёлся с отзывами'
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (0, 0)
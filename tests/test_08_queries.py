@@ -0,0 +1,163 @@
+import copy
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import get_user_key
+from api.cache import get_cache
+
+from .common import auth_client, create_comments
+
+
+# Бюджет SQL-запросов на один запрос к API. Число запросов не должно
+# зависеть от количества объектов на странице.
+QUERY_BUDGET = {
+    'titles-list': 3,
+    'titles-detail': 2,
+    'reviews-list': 3,
+    'reviews-detail': 1,
+    'comments-list': 3,
+    'comments-detail': 1,
+    'users-list': 2,
+}
+
+
+class Test08QueryBudget:
+
+    def assert_budget(self, client, url, name):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+        )
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        assert len(context) == QUERY_BUDGET[name], (
+            f'Проверьте, что GET запрос `{url}` выполняет '
+            f'{QUERY_BUDGET[name]} SQL-запроса(ов), а не {len(context)}:\n'
+            f'{queries}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_catalog_queries(self, client, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            admin_client, admin
+        )
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        self.assert_budget(client, '/api/v1/titles/', 'titles-list')
+        self.assert_budget(client, f'/api/v1/titles/{title_id}/',
+                           'titles-detail')
+        self.assert_budget(client, reviews_url, 'reviews-list')
+        self.assert_budget(client, f'{reviews_url}{review_id}/',
+                           'reviews-detail')
+        self.assert_budget(client, comments_url, 'comments-list')
+        self.assert_budget(client, f'{comments_url}{comments[0]["id"]}/',
+                           'comments-detail')
+
+        # Новые объекты не должны добавлять запросов к странице
+        auth_client(moderator).post(f'{reviews_url}{reviews[1]["id"]}/'
+                                    f'comments/', data={'text': 'ещё'})
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Ещё одно', 'year': 2001, 'genre': ['comedy', 'drama'],
+            'category': 'films',
+        })
+        self.assert_budget(client, '/api/v1/titles/', 'titles-list')
+        self.assert_budget(client, reviews_url, 'reviews-list')
+        self.assert_budget(client, comments_url, 'comments-list')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_users_queries(self, admin_client, admin):
+        create_comments(admin_client, admin)
+        # Пользователь из JWT-токена попадает в кеш на GET-запросе
+        admin_client.get('/api/v1/users/me/')
+        self.assert_budget(admin_client, '/api/v1/users/', 'users-list')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cached_user_invalidation(self, admin_client, user):
+        client = auth_client(user)
+        assert client.get('/api/v1/users/').status_code == 403
+        admin_client.patch(f'/api/v1/users/{user.username}/',
+                           data={'role': 'admin'})
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли сбрасывает кеш пользователя '
+            'JWT-аутентификации'
+        )
+        admin_client.patch(f'/api/v1/users/{user.username}/',
+                           data={'role': 'user'})
+        assert client.get('/api/v1/users/').status_code == 403
+        user.refresh_from_db()
+        user.is_active = False
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что отключённый пользователь не проходит '
+            'аутентификацию'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_me_queries(self, user):
+        client = auth_client(user)
+        client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert len(context) == 0, (
+            'Проверьте, что GET запрос `/api/v1/users/me/` не обращается '
+            'к базе, если пользователь уже загружен при аутентификации'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.patch('/api/v1/users/me/',
+                                    data={'bio': 'новое', 'role': 'admin'})
+        assert response.status_code == 200
+        assert response.json()['role'] == 'user', (
+            'Проверьте, что пользователь не может сам изменить себе роль'
+        )
+        updates = [query['sql'] for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1 and '"role"' not in updates[0], (
+            'Проверьте, что PATCH запрос `/api/v1/users/me/` выполняет один '
+            'UPDATE только изменившихся полей:\n' + '\n'.join(updates)
+        )
+        user.refresh_from_db()
+        assert user.bio == 'новое' and user.role == 'user'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_stale_cached_user(self, user, settings):
+        client = auth_client(user)
+        stale = copy.copy(user)
+        stale.role = 'admin'
+        get_cache().set(get_user_key(user.pk), stale)
+        response = client.patch('/api/v1/users/me/', data={'role': 'admin'})
+        assert response.json()['role'] == 'user', (
+            'Проверьте, что запрос на изменение проверяет роль по '
+            'пользователю из базы, а не из кеша'
+        )
+        user.refresh_from_db()
+        assert user.role == 'user'
+
+        settings.API_RESPONSE_CACHE = dict(settings.API_RESPONSE_CACHE,
+                                           SHARED=False)
+        get_cache().clear()
+        client.get('/api/v1/users/me/')
+        assert get_cache().get(get_user_key(user.pk)) is None, (
+            'Проверьте, что без общего кеша пользователь не кешируется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_cached_user_after_import(self, django_user_model):
+        user = django_user_model.objects.create_user(
+            id=101, username='before_import', email='before@yamdb.fake'
+        )
+        client = auth_client(user)
+        client.get('/api/v1/users/me/')
+        assert get_cache().get(get_user_key(user.pk)) is not None
+        call_command('import_csv', 'users', workers=1, stdout=StringIO())
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['username'] == 'capt_obvious', (
+            'Проверьте, что import_csv сбрасывает кеш пользователей: '
+            'пользователь с тем же id загружен заново'
+        )
@@ -0,0 +1,71 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review, User
+
+from .common import create_comments, create_titles
+
+
+class Test09KeysetPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        for number in range(25):
+            author = User.objects.create(username=f'reader{number}',
+                                         email=f'reader{number}@yamdb.fake')
+            Review.objects.create(title_id=title_id, author=author,
+                                  text=f'Отзыв {number}', score=5)
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        response = client.get(url)
+        assert 'count' in response.json(), (
+            f'Проверьте, что GET запрос `{url}` без параметра `pagination` '
+            'по-прежнему возвращает постраничный вывод с `count`'
+        )
+
+        ids = []
+        next_url = f'{url}?pagination=cursor'
+        while next_url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(next_url)
+            assert response.status_code == 200, (
+                f'Проверьте, что GET запрос `{next_url}` возвращает статус 200'
+            )
+            assert not any('COUNT(' in query['sql'].upper()
+                           for query in context.captured_queries), (
+                f'Проверьте, что GET запрос `{next_url}` не выполняет COUNT'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                f'Проверьте, что GET запрос `{next_url}` в режиме курсора '
+                'не возвращает `count`'
+            )
+            ids.extend(review['id'] for review in data['results'])
+            next_url = data['next']
+        expected = list(Review.objects.filter(
+            title_id=title_id).values_list('id', flat=True))
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация отзывов проходит все отзывы '
+            'в порядке убывания id без пропусков и повторов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comments_cursor(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/?pagination=cursor')
+        response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+        )
+        data = response.json()
+        assert [comment['id'] for comment in data['results']] == sorted(
+            (comment['id'] for comment in comments), reverse=True
+        ), (
+            f'Проверьте, что GET запрос `{url}` возвращает комментарии '
+            'в порядке убывания id'
+        )
+        assert data['next'] is None and data['previous'] is None
@@ -0,0 +1,66 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_titles, create_users_api
+
+
+class Test10ResponseCache:
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}` возвращается статус 200'
+        )
+        return response.json(), len(context)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cache(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        for url in ('/api/v1/titles/', title_url, '/api/v1/genres/',
+                    '/api/v1/categories/'):
+            first, _ = self.get(client, url)
+            second, queries = self.get(client, url)
+            assert second == first and queries == 0, (
+                f'Проверьте, что повторный GET запрос `{url}` отдаётся из '
+                'кеша без обращений к базе данных'
+            )
+
+        admin_client.patch(title_url, data={'name': 'Новое название'})
+        data, _ = self.get(client, title_url)
+        assert data['name'] == 'Новое название', (
+            'Проверьте, что изменение произведения сбрасывает кеш'
+        )
+
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(f'{title_url}reviews/',
+                               data={'text': 'Отзыв', 'score': 7})
+        data, _ = self.get(client, title_url)
+        assert data['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кеш рейтинга произведения'
+        )
+
+        admin_client.delete('/api/v1/genres/horror/')
+        data, _ = self.get(client, '/api/v1/titles/')
+        genres = {genre['slug'] for title in data['results']
+                  for genre in title['genre']}
+        assert 'horror' not in genres, (
+            'Проверьте, что удаление жанра сбрасывает кеш списка произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cache_stats(self, client, admin_client, user_client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = user_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 403, (
+            'Проверьте, что статистика кеша доступна только администратору'
+        )
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 200
+        stats = response.json()['GenreViewSet']
+        assert stats['hits'] >= 1 and stats['misses'] >= 1, (
+            'Проверьте, что статистика кеша считает попадания и промахи'
+        )
@@ -0,0 +1,173 @@
+import pytest
+from django.core.cache import caches
+
+from api.cache import bump_versions, get_stats
+from api.checks import check_response_cache
+from reviews.models import Title
+
+from .common import auth_client, create_reviews
+
+
+class Test11ConditionalRequests:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_if_none_match(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            reviews_url,
+            f'{reviews_url}{reviews[0]["id"]}/',
+            f'{reviews_url}{reviews[0]["id"]}/comments/',
+            '/api/v1/genres/',
+            '/api/v1/categories/',
+        )
+        for url in urls:
+            response = client.get(url)
+            etag = response.get('ETag')
+            assert etag, (
+                f'Проверьте, что ответ на GET запрос `{url}` содержит ETag'
+            )
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, (
+                f'Проверьте, что GET запрос `{url}` с актуальным '
+                '`If-None-Match` возвращает статус 304'
+            )
+
+        etag = client.get(reviews_url)['ETag']
+        admin_client.patch(f'{reviews_url}{reviews[1]["id"]}/',
+                           data={'text': 'Новый текст'})
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение отзыва меняет ETag списка отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_if_match(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/'
+        etag = client.get(url)['ETag']
+        user_client = auth_client(user)
+        response = user_client.patch(url, data={'text': 'Первая правка'},
+                                     HTTP_IF_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что PATCH запрос `{url}` с актуальным `If-Match` '
+            'возвращает статус 200'
+        )
+        response = user_client.patch(url, data={'text': 'Вторая правка'},
+                                     HTTP_IF_MATCH=etag)
+        assert response.status_code == 412, (
+            f'Проверьте, что PATCH запрос `{url}` с устаревшим `If-Match` '
+            'возвращает статус 412'
+        )
+        assert client.get(url).json()['text'] == 'Первая правка'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_versions_without_shared_cache(self, client, admin_client,
+                                              admin, settings):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        settings.API_RESPONSE_CACHE = dict(settings.API_RESPONSE_CACHE,
+                                           ALIAS=None, SHARED=False)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = client.get(url)['ETag']
+        # Другой воркер: кеша в памяти процесса у него нет
+        caches['default'].clear()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304, (
+            'Проверьте, что без общего кеша версии моделей хранятся в базе '
+            'и ETag совпадает во всех воркерах'
+        )
+        response = admin_client.patch(url, data={'name': 'Новое'},
+                                      HTTP_IF_MATCH=etag)
+        assert response.status_code == 200
+        caches['default'].clear()
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что без общего кеша изменение в одном воркере '
+            'меняет ETag во всех'
+        )
+        response = admin_client.patch(url, data={'name': 'Ещё новее'},
+                                      HTTP_IF_MATCH=etag)
+        assert response.status_code == 412
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_object_preconditions(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        response = client.get('/api/v1/titles/999999/',
+                              HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == 404, (
+            'Проверьте, что `If-None-Match: *` для несуществующего объекта '
+            'возвращает 404'
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url, HTTP_IF_NONE_MATCH='*').status_code == 304
+
+        etag = client.get(url)['ETag']
+        response = auth_client(user).post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={'text': 'Другой отзыв', 'score': 2}
+        )
+        assert response.status_code == 201
+        assert client.get(url)['ETag'] == etag, (
+            'Проверьте, что отзыв к другому произведению не меняет ETag '
+            'произведения'
+        )
+        response = admin_client.patch(url, data={'name': 'Новое название'},
+                                      HTTP_IF_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что `If-Match` не устаревает от изменений других '
+            'объектов'
+        )
+        etag = response['ETag']
+        assert client.get(url)['ETag'] == etag
+        auth_client(user).patch(
+            f'{url}reviews/{reviews[1]["id"]}/', data={'score': 10}
+        )
+        assert client.get(url)['ETag'] != etag, (
+            'Проверьте, что изменение оценки меняет ETag произведения'
+        )
+
+        review_url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+                      f'{reviews[0]["id"]}/')
+        response = auth_client(user).patch(review_url, data={'text': 'Чужой'},
+                                           HTTP_IF_MATCH='"stale"')
+        assert response.status_code == 403, (
+            'Проверьте, что права проверяются раньше `If-Match`'
+        )
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/999999/',
+            data={'text': 'Нет'}, HTTP_IF_MATCH='"stale"'
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что для несуществующего объекта PATCH с `If-Match` '
+            'возвращает 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_local_response_cache(self, client, admin_client, admin,
+                                     settings):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        settings.API_RESPONSE_CACHE = dict(settings.API_RESPONSE_CACHE,
+                                           SHARED=None)
+        assert check_response_cache(None) == [], (
+            'Проверьте, что кеш ответов в памяти процесса разрешён'
+        )
+        client.get('/api/v1/titles/')
+        hits = get_stats()['TitleViewSet']['hits']
+        client.get('/api/v1/titles/')
+        assert get_stats()['TitleViewSet']['hits'] == hits + 1, (
+            'Проверьте, что ответы каталога кешируются в памяти процесса'
+        )
+        # Изменение в другом воркере: версия в базе сдвигается, а его
+        # кеш в памяти процесса этот воркер не видит
+        Title.objects.filter(pk=titles[0]['id']).update(name='Другое')
+        bump_versions('title')
+        names = [title['name']
+                 for title in client.get('/api/v1/titles/').json()['results']]
+        assert 'Другое' in names, (
+            'Проверьте, что ключ кеша ответов содержит версии из базы'
+        )
+        settings.API_RESPONSE_CACHE['ALIAS'] = 'missing'
+        assert [error.id for error in check_response_cache(None)] == [
+            'api.E001'
+        ]
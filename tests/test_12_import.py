@@ -0,0 +1,129 @@
+import os
+import shutil
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+class Test12DatasetImport:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_import_csv(self, client):
+        call_command('import_csv', workers=1)
+        counts = {
+            Category: 3, Genre: 15, Title: 32, Title.genre.through: 42,
+            User: 5, Review: 72, Comment: 3,
+        }
+        for model, count in counts.items():
+            assert model.objects.count() == count, (
+                f'Проверьте, что import_csv загружает все строки '
+                f'{model._meta.db_table}'
+            )
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat().startswith('2019-09-24T21:08:21'), (
+            'Проверьте, что import_csv сохраняет дату публикации из CSV'
+        )
+        title = Title.objects.get(pk=1)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == sum(scores) / len(scores), (
+            'Проверьте, что после импорта рейтинг произведений пересчитан'
+        )
+        response = client.get('/api/v1/titles/1/')
+        assert response.status_code == 200
+        assert response.json()['genre'] == [
+            {'name': genre.name, 'slug': genre.slug}
+            for genre in title.genre.all()
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_resume_import(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        checkpoint_dir = str(tmp_path / 'checkpoints')
+        shutil.copytree(os.path.join(settings.BASE_DIR, 'static', 'data'),
+                        data_dir)
+        review_csv = data_dir / 'review.csv'
+        original = review_csv.read_text(encoding='utf-8')
+        # Ломаем оценку в последней строке файла отзывов
+        broken = original.rstrip('\n').rsplit(',', 2)
+        review_csv.write_text(f'{broken[0]},не число,{broken[2]}\n',
+                              encoding='utf-8')
+        options = {'data_dir': str(data_dir), 'chunk_size': 10,
+                   'workers': 1, 'checkpoint_dir': checkpoint_dir}
+        with pytest.raises(CommandError):
+            call_command('import_csv', **options)
+        imported = Review.objects.count()
+        assert 0 < imported < 72, (
+            'Проверьте, что import_csv фиксирует пачки до сбоя'
+        )
+        assert Title.objects.count() == 32
+        title = Review.objects.first().title
+        assert title.rating_count == title.reviews.count(), (
+            'Проверьте, что import_csv пересчитывает рейтинг и после сбоя'
+        )
+
+        review_csv.write_text(original, encoding='utf-8')
+        call_command('import_csv', resume=True, **options)
+        assert Review.objects.count() == 72, (
+            'Проверьте, что import_csv --resume догружает оставшиеся строки'
+        )
+        assert Comment.objects.count() == 3
+        assert not os.path.exists(checkpoint_dir), (
+            'Проверьте, что после успешной загрузки прогресс удаляется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_genre_title_validation(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        shutil.copytree(os.path.join(settings.BASE_DIR, 'static', 'data'),
+                        data_dir)
+        with open(data_dir / 'genre_title.csv', 'a', encoding='utf-8') as f:
+            # Повтор существующей пары и ссылка на несуществующее произведение
+            f.write('\n1001,1,1\n1002,100500,1\n')
+        call_command('import_csv', data_dir=str(data_dir), workers=1,
+                     checkpoint_dir=str(tmp_path / 'checkpoints'))
+        assert Title.genre.through.objects.count() == 42, (
+            'Проверьте, что import_csv пропускает повторяющиеся пары и '
+            'ссылки на несуществующие произведения в genre_title'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_export_roundtrip(self, tmp_path):
+        call_command('import_csv', workers=1,
+                     checkpoint_dir=str(tmp_path / 'checkpoints'))
+        export_dir = tmp_path / 'export'
+        call_command('export_dataset', output_dir=str(export_dir))
+        source_dir = os.path.join(settings.BASE_DIR, 'static', 'data')
+        for filename in os.listdir(source_dir):
+            with open(os.path.join(source_dir, filename),
+                      encoding='utf-8') as source:
+                header = source.readline()
+            with open(export_dir / filename, encoding='utf-8') as exported:
+                assert exported.readline().startswith(header.rstrip()), (
+                    f'Проверьте, что export_dataset сохраняет колонки '
+                    f'{filename}'
+                )
+        Title.objects.filter(pk=1).update(description='Описание')
+        User.objects.filter(pk=100).update(is_staff=True, is_superuser=True,
+                                           password='hash')
+        call_command('export_dataset', output_dir=str(export_dir))
+        snapshot = {
+            model: list(model.objects.order_by('pk').values())
+            for model in (Title, User, Review, Comment)
+        }
+        call_command('import_csv', data_dir=str(export_dir), workers=1,
+                     checkpoint_dir=str(tmp_path / 'checkpoints'))
+        assert Review.objects.count() == 72
+        for model, rows in snapshot.items():
+            assert list(model.objects.order_by('pk').values()) == rows, (
+                f'Проверьте, что export_dataset выгружает все поля '
+                f'{model.__name__} и они загружаются обратно без изменений'
+            )
+
+        call_command('export_dataset', 'users', output_dir=str(export_dir),
+                     export_format='ndjson')
+        with open(export_dir / 'users.ndjson', encoding='utf-8') as exported:
+            assert len(exported.readlines()) == User.objects.count()
@@ -0,0 +1,88 @@
+import copy
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from api import search
+from reviews.models import Title
+
+from .common import create_titles
+
+
+class Test13TitleSearch:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Драма драм', 'year': 1999, 'genre': ['drama'],
+            'category': 'films', 'description': 'Снова драма и поворот',
+        })
+        response = client.get('/api/v1/titles/?search=повор')
+        assert response.status_code == 200
+        names = [title['name'] for title in response.json()['results']]
+        assert set(names) == {'Поворот туда', 'Драма драм'}, (
+            'Проверьте, что параметр `search` ищет по префиксу в названии '
+            'и описании произведения'
+        )
+        response = client.get('/api/v1/titles/?search=драма')
+        names = [title['name'] for title in response.json()['results']]
+        assert names[0] == 'Драма драм', (
+            'Проверьте, что результаты `search` упорядочены по релевантности'
+        )
+        assert 'Проект' in names
+
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/',
+                           data={'description': 'Комедия положений'})
+        response = client.get('/api/v1/titles/?search=драма')
+        names = [title['name'] for title in response.json()['results']]
+        assert 'Проект' not in names, (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения'
+        )
+        response = client.get('/api/v1/titles/?search=КОМЕД&year=2020')
+        assert response.json()['count'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_backend_after_migration(self, monkeypatch):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Проверка таблицы FTS5 только для SQLite')
+        monkeypatch.setattr(search, '_backends', {})
+        table_names = connection.introspection.table_names
+        monkeypatch.setattr(connection.introspection, 'table_names',
+                            lambda *args: [])
+        assert isinstance(search.get_search_backend(),
+                          search.FallbackSearchBackend)
+        monkeypatch.setattr(connection.introspection, 'table_names',
+                            table_names)
+        assert isinstance(search.get_search_backend(),
+                          search.SQLiteSearchBackend), (
+            'Проверьте, что поиск без индекса не запоминается и индекс '
+            'подключается после миграции без перезапуска'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_search_after_table_rebuild(self, client, admin_client):
+        if connection.vendor != 'sqlite':
+            pytest.skip('Триггеры поискового индекса только для SQLite')
+        # Так SQLite выполняет AlterField: reviews_title пересоздаётся
+        old_field = Title._meta.get_field('year')
+        new_field = copy.copy(old_field)
+        new_field.null = True
+        with connection.schema_editor() as editor:
+            editor.alter_field(Title, old_field, new_field)
+            editor.alter_field(Title, new_field, old_field)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master "
+                           "WHERE type = 'trigger'")
+            assert not cursor.fetchall()
+        call_command('migrate', verbosity=0)
+
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/?search=повор')
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Поворот туда'], (
+            'Проверьте, что поисковый индекс обновляется после миграции, '
+            'пересоздающей таблицу произведений'
+        )
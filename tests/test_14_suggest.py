@@ -0,0 +1,111 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.suggest import index
+
+from .common import auth_client, create_titles, create_users_api
+
+
+class Test14Suggest:
+    url = '/api/v1/suggest/'
+
+    def get_names(self, client, query):
+        response = client.get(self.url, data=query)
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{self.url}` '
+            'возвращается статус 200'
+        )
+        return [item['name'] for item in response.json()]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_suggest(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.get_names(client, {'q': 'п'}) == [
+            'Поворот туда', 'Проект'
+        ], (
+            'Проверьте, что подсказки ищутся по началу названия '
+            'и упорядочены по алфавиту'
+        )
+        assert self.get_names(client, {'q': 'ТУД'}) == ['Поворот туда'], (
+            'Проверьте, что подсказки ищутся по началу любого слова '
+            'без учёта регистра'
+        )
+        response = client.get(self.url, data={'q': 'ф'})
+        assert response.json() == [
+            {'type': 'category', 'slug': 'films', 'name': 'Фильм'}
+        ]
+        assert self.get_names(
+            client, {'q': 'к', 'type': ['genre']}
+        ) == ['Комедия'], (
+            'Проверьте, что параметр `type` ограничивает типы подсказок'
+        )
+        assert len(self.get_names(client, {'q': 'п', 'limit': 1})) == 1
+
+        with CaptureQueriesContext(connection) as context:
+            self.get_names(client, {'q': 'пр'})
+        assert len(context) == 0, (
+            'Проверьте, что подсказки не обращаются к базе данных'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/',
+                           data={'name': 'Старый проект'})
+        admin_client.delete('/api/v1/genres/comedy/')
+        with CaptureQueriesContext(connection) as context:
+            assert self.get_names(client, {'q': 'про'}) == ['Старый проект']
+            assert self.get_names(client, {'q': 'ком'}) == []
+        assert len(context) == 0, (
+            'Проверьте, что индекс подсказок обновляется при записи '
+            'без полной перестройки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_suggest_validation(self, client):
+        assert client.get(self.url).status_code == 400, (
+            'Проверьте, что без параметра `q` возвращается статус 400'
+        )
+        response = client.get(self.url, data={'q': 'а', 'limit': 100})
+        assert response.status_code == 400
+        response = client.get(self.url, data={'q': 'а', 'type': 'user'})
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_no_rebuild_without_renames(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        user, _ = create_users_api(admin_client)
+        self.get_names(client, {'q': 'п'})
+        entries = index.data[0]
+        auth_client(user).post(f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                               data={'text': 'Отзыв', 'score': 7})
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/',
+                           data={'year': 2001})
+        with CaptureQueriesContext(connection) as context:
+            self.get_names(client, {'q': 'п'})
+        assert len(context) == 0, (
+            'Проверьте, что отзывы и изменения без смены названия не '
+            'перестраивают индекс подсказок'
+        )
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/',
+                           data={'name': 'Поворот обратно'})
+        assert self.get_names(client, {'q': 'обр'}) == ['Поворот обратно']
+        assert index.data[0] is not entries and entries == sorted(entries), (
+            'Проверьте, что запись в индекс заменяет список ключей, а не '
+            'меняет его во время поиска'
+        )
+        assert [key for key, *_ in entries if key.startswith('обр')] == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_suggest_after_import(self, client, admin_client):
+        create_titles(admin_client)
+        assert self.get_names(client, {'q': 'побег'}) == []
+        call_command('import_csv', workers=1, stdout=StringIO())
+        assert self.get_names(client, {'q': 'побег'}) == [
+            'Побег из Шоушенка'
+        ], (
+            'Проверьте, что после import_csv индекс подсказок '
+            'перестраивается'
+        )
+        assert self.get_names(client, {'q': 'поворот'}) == []
@@ -0,0 +1,71 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Comment, OutgoingEmail, Review, Title, User
+
+
+class Test15Benchmark:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_generate_dataset(self):
+        call_command('generate_dataset', users=20, moderators=2, admins=1,
+                     titles=30, genres=4, categories=2, reviews=200,
+                     comments=300, stdout=StringIO())
+        assert User.objects.filter(role=User.MODERATOR).count() == 2
+        assert User.objects.filter(role=User.ADMINISTRATOR).count() == 1
+        assert Title.objects.count() == 30
+        assert 190 <= Review.objects.count() <= 210, (
+            'Проверьте, что generate_dataset создаёт заданное количество '
+            'отзывов'
+        )
+        assert Comment.objects.count() >= 290
+        counts = sorted(Title.objects.values_list('rating_count', flat=True))
+        assert counts[-1] == 23 and counts[0] < 5, (
+            'Проверьте, что отзывы распределены неравномерно и у автора '
+            'не больше одного отзыва на произведение'
+        )
+        review = Review.objects.order_by('id').first()
+        title = review.title
+        assert title.rating_count == title.reviews.count(), (
+            'Проверьте, что generate_dataset пересчитывает рейтинг'
+        )
+
+        call_command('generate_dataset', users=5, titles=5, reviews=10,
+                     comments=0, stdout=StringIO())
+        assert Title.objects.count() == 35, (
+            'Проверьте, что повторный запуск generate_dataset добавляет '
+            'данные к существующим'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bench_api(self, tmp_path):
+        call_command('generate_dataset', users=10, titles=10, reviews=50,
+                     comments=50, stdout=StringIO())
+        baseline = tmp_path / 'baseline.json'
+        out = StringIO()
+        call_command('bench_api', requests=3, warmup=1, save=str(baseline),
+                     stdout=out)
+        results = json.loads(baseline.read_text())['results']
+        for name in ('titles-list', 'reviews-list', 'comments-list',
+                     'signup', 'token', 'title-patch', 'review-patch'):
+            assert name in results, (
+                f'Проверьте, что bench_api замеряет сценарий {name}'
+            )
+            assert {'p50', 'p90', 'p99', 'queries',
+                    'alloc_kib'} <= set(results[name])
+        assert not User.objects.filter(
+            username__startswith='bench_'
+        ).exists(), 'Проверьте, что bench_api удаляет свои объекты'
+        assert not OutgoingEmail.objects.filter(
+            recipients__startswith='bench_'
+        ).exists(), (
+            'Проверьте, что bench_api удаляет письма регистраций из очереди'
+        )
+
+        out = StringIO()
+        call_command('bench_api', 'reviews-list', requests=3, warmup=1,
+                     compare=str(baseline), tolerance=1000, stdout=out)
+        assert 'reviews-list' in out.getvalue()
@@ -0,0 +1,51 @@
+import re
+
+import pytest
+
+from api.instrumentation import store
+from .common import create_reviews
+
+
+class Test16Instrumentation:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, client, admin_client, admin, settings):
+        settings.API_INSTRUMENTATION = {'SAMPLE_RATE': 1.0}
+        store.reset()
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = admin_client.get(url)
+        header = response.get('Server-Timing', '')
+        match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', header)
+        assert match and int(match.group(1)) > 0, (
+            'Проверьте, что ответ содержит заголовок Server-Timing со '
+            'временем и количеством SQL-запросов'
+        )
+        for metric in ('total;dur=', 'serializer;dur=', 'size;desc='):
+            assert metric in header
+
+        response = admin_client.get('/api/v1/instrumentation/')
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats['ReviewViewSet.list']['queries']['count'] == 1, (
+            'Проверьте, что замеры копятся по view и действию'
+        )
+        assert stats['ReviewViewSet.list']['serializer']['mean'] > 0
+        assert stats['ReviewViewSet.create']['total']['count'] == 3
+        assert client.get('/api/v1/instrumentation/').status_code == 401
+
+        assert 'Server-Timing' not in client.get(url), (
+            'Проверьте, что Server-Timing не отдаётся анонимным клиентам'
+        )
+        settings.DEBUG = True
+        assert 'Server-Timing' in client.get(url)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_sampling(self, client, settings):
+        settings.API_INSTRUMENTATION = {'SAMPLE_RATE': 0}
+        store.reset()
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что незамеренные запросы не получают Server-Timing'
+        )
+        assert store.dump() == {}
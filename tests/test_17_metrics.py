@@ -0,0 +1,92 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api.metrics import registry
+
+
+class Test17Metrics:
+
+    def get_metrics(self, client):
+        response = client.get('/metrics')
+        assert response.status_code == 200, (
+            'Проверьте, что `/metrics` доступен для сборщика метрик'
+        )
+        assert response['Content-Type'].startswith('text/plain')
+        return response.content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_metrics(self, client, settings):
+        settings.API_METRICS = {'DIR': None, 'FLUSH_INTERVAL': 1}
+        registry.reset()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.post('/api/v1/auth/signup/', data={
+            'username': 'metrics', 'email': 'metrics@yamdb.fake'
+        })
+        client.get('/api/v1/users/', HTTP_AUTHORIZATION='Bearer broken')
+        text = self.get_metrics(client)
+        for line in (
+            'yamdb_http_requests_total{action="list",method="GET",'
+            'status="200",view="TitleViewSet"} 2',
+            'yamdb_http_requests_total{action="post",method="POST",'
+            'status="200",view="registrations"} 1',
+            'yamdb_http_request_duration_seconds_count{action="list",'
+            'view="TitleViewSet"} 2',
+            'yamdb_response_cache_total{result="hit",view="TitleViewSet"} 1',
+            'yamdb_response_cache_total{result="miss",view="TitleViewSet"} 1',
+            'yamdb_jwt_auth_failures_total{reason="token_not_valid"} 1',
+            'yamdb_email_send_seconds_count{kind="outbox"} 1',
+            'yamdb_email_send_seconds_bucket{kind="outbox",'
+            'le="+Inf"} 1',
+        ):
+            assert line in text, (
+                f'Проверьте, что `/metrics` содержит строку `{line}`'
+            )
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in text
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_multiprocess(self, client, settings, tmp_path):
+        settings.API_METRICS = {'DIR': str(tmp_path), 'FLUSH_INTERVAL': 60}
+        registry.reset()
+        labels = [['reason', 'user_not_found']]
+        # Значения другого воркера
+        (tmp_path / 'metrics_1.json').write_text(json.dumps([
+            ['yamdb_jwt_auth_failures_total', labels, 2],
+        ]))
+        registry.inc('yamdb_jwt_auth_failures_total', reason='user_not_found')
+        text = self.get_metrics(client)
+        assert ('yamdb_jwt_auth_failures_total{reason="user_not_found"} 3'
+                in text), (
+            'Проверьте, что `/metrics` складывает значения всех процессов'
+        )
+        assert len(list(tmp_path.glob('metrics_*.json'))) == 2
+
+    def test_03_concurrent_flush(self, settings, tmp_path):
+        settings.API_METRICS = {'DIR': str(tmp_path), 'FLUSH_INTERVAL': 0}
+        registry.reset()
+
+        def work(_):
+            for _ in range(50):
+                registry.inc('yamdb_db_queries_total', view='test')
+
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(work, range(8)))
+        registry.flush()
+        files = list(tmp_path.iterdir())
+        assert [path.name for path in files] == [
+            f'metrics_{os.getpid()}.json'
+        ], 'Проверьте, что после сохранения не остаются временные файлы'
+        assert json.loads(files[0].read_text())[0][2] == 400, (
+            'Проверьте, что одновременные сохранения метрик не мешают '
+            'друг другу'
+        )
+
+        not_directory = tmp_path / 'file'
+        not_directory.write_text('')
+        settings.API_METRICS = {'DIR': str(not_directory),
+                                'FLUSH_INTERVAL': 0}
+        registry.inc('yamdb_db_queries_total', view='test')
+        registry.reset()
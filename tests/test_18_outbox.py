@@ -0,0 +1,107 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from reviews import outbox
+from reviews.models import OutgoingEmail
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class Test18Outbox:
+
+    def signup(self, client, username='outbox'):
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': username, 'email': f'{username}@yamdb.fake',
+        })
+        assert response.status_code == 200
+        return response
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_send_outbox_command(self, client, settings):
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MODE='command')
+        outbox_before = len(mail.outbox)
+        self.signup(client)
+        assert len(mail.outbox) == outbox_before, (
+            'Проверьте, что регистрация не отправляет письмо синхронно'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.PENDING, (
+            'Проверьте, что письмо с кодом подтверждения ставится в очередь'
+        )
+        call_command('send_outbox', once=True, stdout=None)
+        assert len(mail.outbox) == outbox_before + 1
+        assert mail.outbox[-1].to == ['outbox@yamdb.fake']
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.SENT and email.sent_at
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retries(self, client, settings):
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MODE='command',
+                                     MAX_ATTEMPTS=2)
+        settings.EMAIL_BACKEND = f'{__name__}.FailingBackend'
+        self.signup(client)
+        call_command('send_outbox', once=True, stdout=None)
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.PENDING
+        assert email.attempts == 1 and 'SMTP' in email.last_error
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная отправка откладывается'
+        )
+        call_command('send_outbox', once=True, stdout=None)
+        email.refresh_from_db()
+        assert email.attempts == 1, (
+            'Проверьте, что письмо не отправляется раньше времени повтора'
+        )
+        OutgoingEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command('send_outbox', once=True, stdout=None)
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.FAILED, (
+            'Проверьте, что после MAX_ATTEMPTS попыток письмо помечается '
+            'как неотправленное'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_background_thread(self, client, settings):
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MODE='thread')
+        outbox_before = len(mail.outbox)
+        self.signup(client)
+        deadline = time.monotonic() + 5
+        while (len(mail.outbox) == outbox_before
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Проверьте, что фоновый поток отправляет письма из очереди'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_expired_lease(self, client, settings):
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MODE='command')
+        self.signup(client, 'first')
+        self.signup(client, 'second')
+        outbox_before = len(mail.outbox)
+        emails = outbox.claim(10)
+        assert len(emails) == 2
+        # Первый отправитель не успел до конца аренды второго письма
+        OutgoingEmail.objects.filter(id=emails[1].id).update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        assert outbox.send_batch(outbox.claim(10)) == 1
+        assert outbox.send_batch(emails) == 1, (
+            'Проверьте, что письмо, которое забрал другой отправитель после '
+            'истечения аренды, не отправляется повторно'
+        )
+        recipients = [message.to for message in mail.outbox[outbox_before:]]
+        assert sorted(recipients) == [['first@yamdb.fake'],
+                                      ['second@yamdb.fake']]
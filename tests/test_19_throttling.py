@@ -0,0 +1,143 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.throttling import CacheStore, memory_store, parse_rate, take
+
+
+class Test19Throttling:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    def set_rates(self, settings, alias=None, num_proxies=0, **rates):
+        settings.API_THROTTLE = {
+            'ENABLED': True,
+            'ALIAS': alias,
+            'NUM_PROXIES': num_proxies,
+            'RATES': dict(
+                {'ip': '1000/min', 'email': '1000/min',
+                 'username': '1000/min'}, **rates
+            ),
+        }
+
+    def signup(self, client, number, email=None):
+        return client.post(self.url_signup, data={
+            'username': f'user{number}',
+            'email': email or f'user{number}@yamdb.fake',
+        })
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_email_limit(self, client, settings):
+        self.set_rates(settings, email='2/hour')
+        for number in range(2):
+            response = self.signup(client, number, 'same@yamdb.fake')
+            assert response.status_code != 429
+        with CaptureQueriesContext(connection) as context:
+            response = self.signup(client, 3, 'SAME@yamdb.fake ')
+        assert response.status_code == 429, (
+            'Проверьте, что регистрация ограничена по email'
+        )
+        assert int(response['Retry-After']) > 0, (
+            'Проверьте, что ответ 429 содержит заголовок Retry-After'
+        )
+        assert len(context) == 0, (
+            'Проверьте, что запрос сверх лимита отклоняется без обращения '
+            'к базе'
+        )
+        assert self.signup(client, 4).status_code == 200, (
+            'Проверьте, что лимит по email не затрагивает другие адреса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ip_and_username_limits(self, client, settings):
+        self.set_rates(settings, ip='3/min')
+        for number in range(3):
+            assert self.signup(client, number).status_code == 200
+        response = client.post(self.url_token, data={
+            'username': 'user0', 'confirmation_code': 'wrong',
+        })
+        assert response.status_code == 429, (
+            'Проверьте, что лимит по IP общий для регистрации и токена'
+        )
+        assert client.post(
+            self.url_token, data={}, REMOTE_ADDR='10.0.0.2'
+        ).status_code == 400
+
+        memory_store.reset()
+        self.set_rates(settings, username='2/hour')
+        for _ in range(2):
+            response = client.post(self.url_token, data={
+                'username': 'user1', 'confirmation_code': 'wrong',
+            })
+            assert response.status_code == 400
+        response = client.post(self.url_token, data={
+            'username': 'user1', 'confirmation_code': 'wrong',
+        }, REMOTE_ADDR='10.0.0.3')
+        assert response.status_code == 429, (
+            'Проверьте, что подбор confirmation_code ограничен по username '
+            'независимо от IP'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_disabled_and_shared_store(self, client, settings):
+        self.set_rates(settings, ip='1/min')
+        settings.API_THROTTLE['ENABLED'] = False
+        for number in range(3):
+            assert self.signup(client, number).status_code == 200
+        self.set_rates(settings, alias='default', ip='1/min')
+        assert self.signup(client, 10).status_code == 200
+        assert self.signup(client, 11).status_code == 429, (
+            'Проверьте, что корзины хранятся в кеше API_THROTTLE["ALIAS"]'
+        )
+
+    def test_04_token_bucket(self):
+        assert parse_rate('20/min') == (20, 20 / 60)
+        capacity, rate = parse_rate('2/s')
+        state, delay = take(None, capacity, rate, 100.0)
+        state, delay = take(state, capacity, rate, 100.0)
+        assert delay == 0
+        state, delay = take(state, capacity, rate, 100.0)
+        assert delay == pytest.approx(0.5), (
+            'Проверьте, что пустая корзина сообщает время до нового токена'
+        )
+        state, delay = take(state, capacity, rate, 100.5)
+        assert delay == 0, 'Проверьте, что корзина пополняется со временем'
+
+    def test_05_cache_store_timeout(self):
+        class Cache(dict):
+            def set(self, key, value, timeout):
+                self[key] = value
+                self.timeout = timeout
+
+        cache = Cache()
+        store = CacheStore(cache)
+        assert store.consume('key', 10, 1.0) == 0
+        assert cache['key'][0] == 9
+        assert cache.timeout == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_forwarded_for(self, client, settings):
+        self.set_rates(settings, ip='2/min')
+        for number in range(2):
+            response = client.post(self.url_signup, data={
+                'username': f'user{number}',
+                'email': f'user{number}@yamdb.fake',
+            }, HTTP_X_FORWARDED_FOR=f'10.1.0.{number}')
+            assert response.status_code == 200
+        response = client.post(self.url_signup, data={
+            'username': 'user2', 'email': 'user2@yamdb.fake',
+        }, HTTP_X_FORWARDED_FOR='10.1.0.2')
+        assert response.status_code == 429, (
+            'Проверьте, что без доверенных прокси X-Forwarded-For не '
+            'обходит лимит по IP'
+        )
+
+        memory_store.reset()
+        self.set_rates(settings, ip='1/min', num_proxies=1)
+        for address in ('10.2.0.1', '10.2.0.2'):
+            response = client.post(self.url_token, data={},
+                                   HTTP_X_FORWARDED_FOR=f'1.1.1.1, {address}')
+            assert response.status_code == 400, (
+                'Проверьте, что за доверенным прокси лимит считается по '
+                'адресу из X-Forwarded-For'
+            )
@@ -0,0 +1,128 @@
+import asyncio
+import json
+from io import StringIO
+
+import pytest
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+
+from api.asgi import ASGIHandler
+from api.benchmark import get_scope
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class Test20ASGI:
+
+    @pytest.fixture
+    def application(self):
+        application = ASGIHandler(WSGIHandler())
+        yield application
+        application.shutdown()
+
+    def request(self, application, scope, body=b''):
+        messages = [
+            {'type': 'http.request', 'body': body[:5], 'more_body': True},
+            {'type': 'http.request', 'body': body[5:]},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        run(application(scope, receive, send))
+        assert [message['type'] for message in sent] == [
+            'http.response.start', 'http.response.body'
+        ]
+        return sent[0]['status'], dict(sent[0]['headers']), sent[1]['body']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_read_and_write(self, application, client, admin_client):
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Фильмы', 'slug': 'films'})
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Тест', 'year': 2000, 'category': 'films',
+        })
+        title_id = response.json()['id']
+        status, headers, body = self.request(
+            application, get_scope('GET', '/api/v1/titles/')
+        )
+        assert status == 200
+        assert headers[b'content-type'] == b'application/json'
+        assert json.loads(body) == client.get('/api/v1/titles/').json(), (
+            'Проверьте, что ASGI-приложение отдаёт тот же ответ, что и WSGI'
+        )
+        body = json.dumps({'username': 'asgi',
+                           'email': 'asgi@yamdb.fake'}).encode()
+        status, _, content = self.request(application, get_scope(
+            'POST', '/api/v1/auth/signup/', [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+            ]
+        ), body)
+        assert status == 200, (
+            'Проверьте, что ASGI-приложение собирает тело запроса из '
+            'нескольких сообщений'
+        )
+        assert json.loads(content)['username'] == 'asgi'
+
+        scope = get_scope('GET', f'/api/v1/titles/{title_id}/reviews/')
+        assert application.get_pool(scope) is application.read_pool
+        assert application.get_pool(
+            get_scope('GET', '/api/v1/users/')
+        ) is application.pool
+        assert application.get_pool(
+            get_scope('POST', '/api/v1/titles/')
+        ) is application.pool, (
+            'Проверьте, что записи не выполняются в пуле чтения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_disconnect_and_lifespan(self, application):
+        messages = [{'type': 'http.disconnect'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        run(application(get_scope('GET', '/api/v1/titles/'), receive, send))
+        assert sent == [], (
+            'Проверьте, что запрос отключившегося клиента не выполняется'
+        )
+
+        messages = [{'type': 'lifespan.startup'},
+                    {'type': 'lifespan.shutdown'}]
+        run(application({'type': 'lifespan'}, receive, send))
+        assert [message['type'] for message in sent] == [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bench_asgi(self):
+        call_command('generate_dataset', users=10, titles=10, reviews=50,
+                     comments=50, stdout=StringIO())
+        out = StringIO()
+        # Общая тестовая база в памяти не ждёт снятия блокировок, поэтому
+        # записи замеряются только в один поток
+        call_command('bench_asgi', concurrency=[1], requests=20,
+                     write_share=0.2, stdout=StringIO())
+        call_command('bench_asgi', concurrency=[1, 4], requests=20,
+                     write_share=0, stdout=out)
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 5, (
+            'Проверьте, что bench_asgi замеряет WSGI и ASGI для каждого '
+            'числа клиентов'
+        )
+        assert lines[1].startswith('wsgi') and lines[2].startswith('asgi')
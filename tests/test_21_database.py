@@ -0,0 +1,44 @@
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+
+class Test21Database:
+
+    @pytest.mark.django_db
+    def test_01_sqlite_pragmas(self, tmp_path, settings):
+        database = DatabaseWrapper(
+            dict(connection.settings_dict, NAME=str(tmp_path / 'db.sqlite3')),
+            alias='pragmas',
+        )
+        try:
+            with database.cursor() as cursor:
+                values = {}
+                for name in ('journal_mode', 'synchronous', 'busy_timeout',
+                             'mmap_size'):
+                    cursor.execute(f'PRAGMA {name}')
+                    values[name] = cursor.fetchone()[0]
+        finally:
+            database.close()
+        assert values == {
+            'journal_mode': 'wal',
+            'synchronous': 1,
+            'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'],
+            'mmap_size': settings.SQLITE_PRAGMAS['mmap_size'],
+        }, 'Проверьте, что новые соединения с SQLite получают SQLITE_PRAGMAS'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_health_checks(self, client, settings, monkeypatch):
+        closed = []
+        client.get('/api/v1/titles/')
+        monkeypatch.setattr(connection, 'is_usable', lambda: False)
+        monkeypatch.setattr(connection, 'close', lambda: closed.append(1))
+        settings.DB_HEALTH_CHECKS = False
+        client.get('/api/v1/titles/')
+        assert not closed
+        settings.DB_HEALTH_CHECKS = True
+        client.get('/api/v1/titles/')
+        assert closed, (
+            'Проверьте, что перед запросом неработающее соединение '
+            'закрывается'
+        )
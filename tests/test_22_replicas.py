@@ -0,0 +1,137 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connections
+from rest_framework.test import APIClient
+
+from reviews.models import Title
+from tests.common import auth_client
+
+TITLES_URL = '/api/v1/titles/'
+
+
+@pytest.fixture
+def replica(tmp_path):
+    alias = 'replica_1'
+    connections.databases[alias] = dict(
+        connections.databases['default'],
+        NAME=str(tmp_path / 'replica.sqlite3'),
+    )
+    yield alias
+    connections[alias].close()
+    del connections.databases[alias]
+    if hasattr(connections._connections, alias):
+        delattr(connections._connections, alias)
+
+
+class Test22Replicas:
+
+    def get_names(self, client):
+        response = client.get(TITLES_URL)
+        assert response.status_code == 200
+        return {title['name'] for title in response.json()['results']}
+
+    def create_title(self, client, name):
+        response = client.post(TITLES_URL, data={
+            'name': name, 'year': 2000, 'category': 'films',
+        })
+        assert response.status_code == 201
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_read_from_replica(self, client, admin_client, replica,
+                                  settings):
+        settings.API_REPLICAS = dict(settings.API_REPLICAS,
+                                     CACHE_TIMEOUT=0)
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Фильмы', 'slug': 'films'})
+        self.create_title(admin_client, 'Первое')
+        call_command('sync_replica', stdout=StringIO())
+        self.create_title(admin_client, 'Второе')
+        assert Title.objects.using(replica).count() == 1, (
+            'Проверьте, что записи идут только в основную базу'
+        )
+
+        assert self.get_names(client) == {'Первое'}, (
+            'Проверьте, что GET-запросы к каталогу читают с реплики'
+        )
+        assert self.get_names(admin_client) == {'Первое', 'Второе'}, (
+            'Проверьте, что после изменения клиент читает из основной базы'
+        )
+        token_client = APIClient()
+        token_client.credentials(
+            HTTP_AUTHORIZATION=admin_client._credentials['HTTP_AUTHORIZATION']
+        )
+        assert self.get_names(token_client) == {'Первое', 'Второе'}, (
+            'Проверьте, что закрепление за основной базой действует и по '
+            'токену без cookie'
+        )
+
+        call_command('sync_replica', stdout=StringIO())
+        assert self.get_names(client) == {'Первое', 'Второе'}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_pin_expires(self, admin_client, replica, settings):
+        settings.API_REPLICAS = dict(settings.API_REPLICAS, PIN_SECONDS=0,
+                                     CACHE_TIMEOUT=0)
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Фильмы', 'slug': 'films'})
+        call_command('sync_replica', stdout=StringIO())
+        self.create_title(admin_client, 'Первое')
+        assert self.get_names(admin_client) == set(), (
+            'Проверьте, что без закрепления чтения идут на реплику'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_no_etag_from_replica(self, client, admin_client, replica,
+                                     settings):
+        settings.API_REPLICAS = dict(settings.API_REPLICAS,
+                                     CACHE_TIMEOUT=60)
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Фильмы', 'slug': 'films'})
+        self.create_title(admin_client, 'Первое')
+        call_command('sync_replica', stdout=StringIO())
+        self.create_title(admin_client, 'Второе')
+        for _ in range(2):
+            response = client.get(TITLES_URL)
+            assert len(response.json()['results']) == 1
+            assert 'ETag' not in response, (
+                'Проверьте, что ответ с реплики, в том числе из кеша, не '
+                'содержит ETag текущих версий'
+            )
+        response = admin_client.get(TITLES_URL)
+        assert len(response.json()['results']) == 2
+        assert 'ETag' in response, (
+            'Проверьте, что ответ из основной базы содержит ETag'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_auth_reads_primary(self, replica, django_user_model):
+        call_command('sync_replica', stdout=StringIO())
+        user = django_user_model.objects.create_user(
+            username='fresh', email='fresh@yamdb.fake'
+        )
+        assert auth_client(user).get(TITLES_URL).status_code == 200, (
+            'Проверьте, что пользователь из токена читается из основной '
+            'базы, а не с реплики'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_token_reads_primary_without_shared_cache(
+            self, client, admin_client, replica, settings):
+        settings.API_REPLICAS = dict(settings.API_REPLICAS, PIN_SECONDS=0,
+                                     CACHE_TIMEOUT=0)
+        settings.API_RESPONSE_CACHE = dict(settings.API_RESPONSE_CACHE,
+                                           SHARED=False)
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Фильмы', 'slug': 'films'})
+        call_command('sync_replica', stdout=StringIO())
+        self.create_title(admin_client, 'Первое')
+        assert self.get_names(admin_client) == {'Первое'}, (
+            'Проверьте, что без общего кеша запросы с токеном читают из '
+            'основной базы: закрепление в кеше процесса не видно другим '
+            'воркерам'
+        )
+        assert self.get_names(client) == set(), (
+            'Проверьте, что анонимные запросы по-прежнему читают с реплики'
+        )
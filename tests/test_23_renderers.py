@@ -0,0 +1,86 @@
+import datetime
+import decimal
+import uuid
+from io import BytesIO
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import parsers, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from api import renderers as fast
+from tests.common import create_comments
+
+DATA = [
+    None, 'текст', 'разделители \u2028 и \u2029', 12, 2 ** 70,
+    7.333333333333333,
+    {'id': 1, 'genre': [{'name': 'Драма', 'slug': 'drama'}],
+     'category': None, 'rating': 9.5},
+    ReturnList([ReturnDict({'a': 1}, serializer=None)], serializer=None),
+    {1: 'ключ-число', 'дата': datetime.date(2021, 1, 2)},
+    [datetime.datetime(2021, 1, 2, 3, 4, 5, 6789),
+     datetime.datetime(2021, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+     datetime.time(1, 2, 3), datetime.timedelta(seconds=90)],
+    [decimal.Decimal('1.50'), uuid.UUID(int=1), gettext_lazy('Текст'),
+     b'bytes', (1, 2), {'set'}],
+]
+
+
+class Test23Renderers:
+
+    @pytest.mark.parametrize('data', DATA)
+    def test_01_same_output(self, data):
+        assert fast.JSONRenderer().render(data) == (
+            renderers.JSONRenderer().render(data)
+        ), 'Проверьте, что вывод совпадает с JSONRenderer DRF'
+
+    def test_02_indent_and_fallback(self, monkeypatch):
+        data = {'name': 'Тест'}
+        assert fast.JSONRenderer().render(
+            data, 'application/json; indent=2'
+        ) == renderers.JSONRenderer().render(
+            data, 'application/json; indent=2'
+        )
+        monkeypatch.setattr(fast, 'orjson', None)
+        assert fast.JSONRenderer().render(data) == (
+            renderers.JSONRenderer().render(data)
+        ), 'Проверьте, что без orjson работает JSONRenderer DRF'
+        assert fast.JSONParser().parse(BytesIO(b'{"a": 1}')) == {'a': 1}
+
+    @pytest.mark.parametrize('content', [
+        b'{"name": "\xd0\xa2\xd0\xb5\xd1\x81\xd1\x82", "year": 2000}',
+        b'[1, 2.5, null, true]', b'{"big": 123456789012345678901234567890}',
+        b'"\\ud800"',
+    ])
+    def test_03_parser(self, content):
+        assert fast.JSONParser().parse(BytesIO(content)) == (
+            parsers.JSONParser().parse(BytesIO(content))
+        )
+
+    @pytest.mark.parametrize('content', [b'{"a": ', b'NaN', b'\xff'])
+    def test_04_parser_errors(self, content):
+        with pytest.raises(ParseError) as fast_error:
+            fast.JSONParser().parse(BytesIO(content))
+        with pytest.raises(ParseError) as error:
+            parsers.JSONParser().parse(BytesIO(content))
+        assert str(fast_error.value) == str(error.value), (
+            'Проверьте, что текст ошибки совпадает с JSONParser DRF'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_api_responses(self, admin_client, admin):
+        create_comments(admin_client, admin)
+        for url in ('/api/v1/titles/', '/api/v1/genres/', '/api/v1/users/'):
+            response = admin_client.get(url)
+            assert response.content == renderers.JSONRenderer().render(
+                response.data
+            ), f'Проверьте, что ответ `{url}` совпадает с JSONRenderer DRF'
+        response = admin_client.post('/api/v1/categories/', data={
+            'name': 'Комиксы\u2028и\u2029манга', 'slug': 'comics',
+        }, format='json')
+        assert response.status_code == 201
+        assert response.json()['name'] == 'Комиксы\u2028и\u2029манга', (
+            'Проверьте, что API разбирает JSON в теле запроса'
+        )
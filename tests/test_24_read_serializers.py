@@ -0,0 +1,117 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
+
+from api.permissions import IsOwner
+from api.serializers import (CommentSerializer, ReviewSerializer,
+                             TitleSerializer)
+from api.views import ReviewViewSet
+from reviews.models import Comment, Review, Title
+
+from .common import auth_client, create_reviews
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class Test24ReadSerializers:
+
+    def generate(self):
+        call_command('generate_dataset', users=10, titles=15, genres=4,
+                     categories=2, reviews=60, comments=60, stdout=StringIO())
+
+    def check_results(self, results, model, serializer, url):
+        objects = model.objects.in_bulk([item['id'] for item in results])
+        expected = [serializer(objects[item['id']]).data for item in results]
+        assert render(results) == render(expected), (
+            f'Проверьте, что ответ `{url}` совпадает с ответом '
+            f'{serializer.__name__}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles(self, admin_client):
+        self.generate()
+        title = Title.objects.filter(genre__isnull=False).first()
+        genre = title.genre.first()
+        urls = (
+            '/api/v1/titles/', '/api/v1/titles/?pagination=cursor',
+            f'/api/v1/titles/?genre={genre.slug}',
+            f'/api/v1/titles/?search={title.name.split()[0]}',
+        )
+        for url in urls:
+            response = admin_client.get(url)
+            assert response.status_code == 200
+            results = response.json()['results']
+            assert results, f'Проверьте, что `{url}` возвращает произведения'
+            self.check_results(results, Title, TitleSerializer, url)
+
+        url = f'/api/v1/titles/{title.id}/'
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        self.check_results([response.json()], Title, TitleSerializer, url)
+        assert admin_client.get('/api/v1/titles/0/').status_code == 404, (
+            'Проверьте, что для несуществующего произведения возвращается 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments(self, client):
+        self.generate()
+        review = Comment.objects.select_related('review').first().review
+        base = f'/api/v1/titles/{review.title_id}/reviews/'
+        for url in (base, f'{base}?pagination=cursor'):
+            response = client.get(url)
+            assert response.status_code == 200
+            self.check_results(response.json()['results'], Review,
+                               ReviewSerializer, url)
+        url = f'{base}{review.id}/'
+        self.check_results([client.get(url).json()], Review,
+                           ReviewSerializer, url)
+
+        url = f'{base}{review.id}/comments/'
+        response = client.get(url)
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == review.comments.count(), (
+            'Проверьте, что список комментариев отфильтрован по отзыву'
+        )
+        self.check_results(results, Comment, CommentSerializer, url)
+        url = f'{url}{results[0]["id"]}/'
+        self.check_results([client.get(url).json()], Comment,
+                           CommentSerializer, url)
+
+        other = Review.objects.exclude(title_id=review.title_id).first()
+        assert client.get(
+            f'/api/v1/titles/{review.title_id}/reviews/{other.id}/'
+        ).status_code == 404, (
+            'Проверьте, что отзыв другого произведения не возвращается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bench_serializers(self):
+        self.generate()
+        out = StringIO()
+        call_command('bench_serializers', count=20, repeat=1, stdout=out)
+        output = out.getvalue()
+        for name in ('titles', 'reviews', 'comments'):
+            assert name in output, (
+                'Проверьте, что bench_serializers выводит стоимость объекта '
+                f'для {name}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_object_permissions(self, admin_client, admin, monkeypatch):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        # Проверка прав, которой нужен сам объект, а не только метод
+        monkeypatch.setattr(ReviewViewSet, 'permission_classes', [IsOwner])
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[1]["id"]}/')
+        response = auth_client(user).get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что права объекта в retrieve проверяются по '
+            'экземпляру модели'
+        )
+        assert response.json()['text'] == 'qwerty123'
+        assert admin_client.get(url).status_code == 403
@@ -0,0 +1,28 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+
+class Test25BenchIndexes:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bench_indexes(self):
+        out = StringIO()
+        call_command('bench_indexes', seed=True, users=3, titles=4,
+                     reviews=10, comments=10, repeat=2, write_rows=10,
+                     stdout=out)
+        output = out.getvalue()
+        for index in ('unique_review', 'reviews_rev_title_i_f19e4a_idx',
+                      'reviews_com_review__29c3c5_idx'):
+            assert index in output, (
+                f'Проверьте, что `bench_indexes` замеряет индекс {index}'
+            )
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(
+                cursor, 'reviews_comment'
+            )
+        assert 'bench_comment_text' not in indexes, (
+            'Проверьте, что `bench_indexes` откатывает изменения схемы'
+        )